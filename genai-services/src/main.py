@@ -136,6 +136,8 @@ from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 import asyncio
 
 from .vision_ai.routes.vision_routes import router as vision_router
@@ -173,7 +175,8 @@ app = FastAPI(
     title="Vision AI Microservice",
     description="AI-powered vision endpoints",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS - allow all origins for now
@@ -185,6 +188,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON responses above 512 bytes
+app.add_middleware(GZipMiddleware, minimum_size=512)
+
 @app.middleware("http")
 async def timeout_middleware(request: Request, call_next):
     """Add timeout to all requests"""
@@ -10,12 +10,16 @@ def preprocess_image(image_bytes: bytes) -> bytes:
         if detected_format not in ["JPEG", "PNG", "WEBP"]:
             img = img.convert("RGB")  # Convert WEBP to RGB
         
+        # JPEG: let the decoder shrink by a power of two first (never below 512),
+        # so phone-sized photos aren't fully decoded just to be resized
+        img.draft("RGB", (512, 512))
+        
         # Resize to 512x512 for consistency
         img = img.convert("RGB").resize((512, 512), Image.Resampling.LANCZOS)
         
         # Save back to bytes
         buffered = io.BytesIO()
-        img.save(buffered, format="JPEG")
+        img.save(buffered, format="JPEG", quality=85)
         return buffered.getvalue()
     except Exception as e:
         raise ValueError(f"Failed to process image: {str(e)}")
\ No newline at end of file
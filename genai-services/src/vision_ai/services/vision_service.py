@@ -1,8 +1,9 @@
 # genai-services/src/vision_ai/services/vision_service.py
 import os
-import base64
+import asyncio
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from dotenv import load_dotenv
 import google.generativeai as genai
 from ..processors.image_processor import preprocess_image
@@ -10,6 +11,12 @@ from ..prompts.prompt_engineering import get_story_prompt
 import logging
 import json
 
+# SIMD base64 when available; falls back to the stdlib (same API)
+try:
+    import pybase64 as _b64
+except Exception:
+    import base64 as _b64
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,7 +31,7 @@ if not GOOGLE_API_KEY:
 genai.configure(api_key=GOOGLE_API_KEY)
 
 # FastAPI app setup
-app = FastAPI(title="Vision AI Service")
+app = FastAPI(title="Vision AI Service", default_response_class=ORJSONResponse)
 
 # Allow cross-origin requests
 app.add_middleware(
@@ -35,12 +42,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _image_parts(processed_bytes: bytes) -> list:
+    """Base64 image part for Gemini (ASCII decode skips UTF-8 validation)."""
+    return [{"mime_type": "image/jpeg", "data": _b64.b64encode(processed_bytes).decode('ascii')}]
+
+
+_gemini_model = None
+
 def _get_gemini_model():
-    """Get Gemini model with fallback."""
+    """Get Gemini model with fallback (built once, reused by every endpoint)."""
+    global _gemini_model
+    if _gemini_model is not None:
+        return _gemini_model
     models = ['gemini-2.5-flash', 'gemini-2.0-flash', 'gemini-pro-vision']
     for model_name in models:
         try:
-            return genai.GenerativeModel(model_name)
+            _gemini_model = genai.GenerativeModel(model_name)
+            return _gemini_model
         except Exception as e:
             logger.warning(f"Model {model_name} failed: {e}")
     raise RuntimeError("No available Gemini models")
@@ -60,14 +78,13 @@ async def generate_story(image: UploadFile):
         logger.info(f"Image size: {len(image_bytes)} bytes")
 
         # Preprocess image
-        processed_bytes = preprocess_image(image_bytes)
+        processed_bytes = await asyncio.to_thread(preprocess_image, image_bytes)
 
         # Configure Gemini model
         model = _get_gemini_model()
 
         # Convert to base64 for Gemini
-        base64_image = base64.b64encode(processed_bytes).decode('utf-8')
-        image_parts = [{"mime_type": "image/jpeg", "data": base64_image}]
+        image_parts = _image_parts(processed_bytes)
 
         # Step 1: Classify craft type, detect skill level, and craft technique
         analysis_prompt = "Analyze this craft image: identify the craft type (e.g., pottery, basket, weaving), estimate the skill level (beginner, intermediate, expert), and describe the main craft technique (e.g., wheel-throwing, coiling, weaving). Return ONLY a JSON object with 'craft_type', 'skill_level', and 'craft_technique'."
@@ -132,14 +149,13 @@ async def similar_crafts(image: UploadFile):
             raise HTTPException(status_code=400, detail=f"No image data provided for file: {image.filename}")
 
         # Preprocess image
-        processed_bytes = preprocess_image(image_bytes)
+        processed_bytes = await asyncio.to_thread(preprocess_image, image_bytes)
 
         # Configure Gemini model
         model = _get_gemini_model()
 
         # Convert to base64 for Gemini
-        base64_image = base64.b64encode(processed_bytes).decode('utf-8')
-        image_parts = [{"mime_type": "image/jpeg", "data": base64_image}]
+        image_parts = _image_parts(processed_bytes)
 
         # Analyze for similarity features
         similarity_prompt = "Analyze this craft image and suggest 3 similar crafts based on visual features (e.g., shape, texture, color). Return ONLY a JSON object with 'similar_crafts' as a list of 3 strings with brief descriptions."
@@ -176,9 +192,8 @@ async def price_suggestion(image: UploadFile):
         image_bytes = await image.read()
         if not image_bytes:
             raise HTTPException(status_code=400, detail="No image data provided")
-        processed_bytes = preprocess_image(image_bytes)
-        base64_image = base64.b64encode(processed_bytes).decode('utf-8')
-        image_parts = [{"mime_type": "image/jpeg", "data": base64_image}]
+        processed_bytes = await asyncio.to_thread(preprocess_image, image_bytes)
+        image_parts = _image_parts(processed_bytes)
 
         # Configure Gemini
         model = _get_gemini_model()
@@ -211,9 +226,8 @@ async def complementary_products(image: UploadFile):
         image_bytes = await image.read()
         if not image_bytes:
             raise HTTPException(status_code=400, detail="No image data provided")
-        processed_bytes = preprocess_image(image_bytes)
-        base64_image = base64.b64encode(processed_bytes).decode('utf-8')
-        image_parts = [{"mime_type": "image/jpeg", "data": base64_image}]
+        processed_bytes = await asyncio.to_thread(preprocess_image, image_bytes)
+        image_parts = _image_parts(processed_bytes)
 
         # Configure Gemini
         model = _get_gemini_model()
@@ -252,9 +266,8 @@ async def purchase_analysis(image: UploadFile):
         image_bytes = await image.read()
         if not image_bytes:
             raise HTTPException(status_code=400, detail="No image data provided")
-        processed_bytes = preprocess_image(image_bytes)
-        base64_image = base64.b64encode(processed_bytes).decode('utf-8')
-        image_parts = [{"mime_type": "image/jpeg", "data": base64_image}]
+        processed_bytes = await asyncio.to_thread(preprocess_image, image_bytes)
+        image_parts = _image_parts(processed_bytes)
 
         # Configure Gemini
         model = _get_gemini_model()
@@ -294,9 +307,8 @@ async def fraud_detection(image: UploadFile):
         image_bytes = await image.read()
         if not image_bytes:
             raise HTTPException(status_code=400, detail="No image data provided")
-        processed_bytes = preprocess_image(image_bytes)
-        base64_image = base64.b64encode(processed_bytes).decode('utf-8')
-        image_parts = [{"mime_type": "image/jpeg", "data": base64_image}]
+        processed_bytes = await asyncio.to_thread(preprocess_image, image_bytes)
+        image_parts = _image_parts(processed_bytes)
 
         # Configure Gemini
         model = _get_gemini_model()
@@ -333,9 +345,8 @@ async def order_fulfillment_analysis(image: UploadFile):
         image_bytes = await image.read()
         if not image_bytes:
             raise HTTPException(status_code=400, detail="No image data provided")
-        processed_bytes = preprocess_image(image_bytes)
-        base64_image = base64.b64encode(processed_bytes).decode('utf-8')
-        image_parts = [{"mime_type": "image/jpeg", "data": base64_image}]
+        processed_bytes = await asyncio.to_thread(preprocess_image, image_bytes)
+        image_parts = _image_parts(processed_bytes)
 
         # Configure Gemini
         model = _get_gemini_model()
@@ -374,9 +385,8 @@ async def quality_predictions(image: UploadFile):
         image_bytes = await image.read()
         if not image_bytes:
             raise HTTPException(status_code=400, detail="No image data provided")
-        processed_bytes = preprocess_image(image_bytes)
-        base64_image = base64.b64encode(processed_bytes).decode('utf-8')
-        image_parts = [{"mime_type": "image/jpeg", "data": base64_image}]
+        processed_bytes = await asyncio.to_thread(preprocess_image, image_bytes)
+        image_parts = _image_parts(processed_bytes)
 
         # Configure Gemini
         model = _get_gemini_model()
@@ -49,6 +49,32 @@ VISION_MODEL_CHAIN: List[str] = [
     "gemini-2.0-flash",
 ]
 
+# Pooled client opened/closed by the app lifespan (open_http_client /
+# close_http_client); keeps TLS connections to the API alive between calls
+_gemini_http: Optional[httpx.AsyncClient] = None
+
+
+def open_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared pooled client, creating it if needed.
+    Called from the app lifespan startup; also covers use outside the app.
+    """
+    global _gemini_http
+    if _gemini_http is None:
+        _gemini_http = httpx.AsyncClient(
+            timeout=90.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=32, keepalive_expiry=30),
+        )
+    return _gemini_http
+
+
+async def close_http_client() -> None:
+    """Close the shared client. Called from the app lifespan shutdown."""
+    global _gemini_http
+    if _gemini_http is not None:
+        await _gemini_http.aclose()
+        _gemini_http = None
+
 
 class GeminiDirectClient:
     """
@@ -145,54 +171,54 @@ class GeminiDirectClient:
         Raises ModelNotFoundError on 404.
         """
         delay = 5  # initial backoff in seconds
-
-        async with httpx.AsyncClient(timeout=90.0) as client:
-            for attempt in range(max_retries + 1):
-                response = await client.post(url, json=body)
-
-                if response.status_code == 200:
-                    return self._extract_text(response.json(), model_name)
-
-                if response.status_code == 429:
-                    if attempt < max_retries:
-                        # Try to read retry-after from response
-                        wait = delay * (2 ** attempt)
-                        try:
-                            err_body = response.json()
-                            # Gemini 429 body contains retry_delay.seconds
-                            retry_seconds = (
-                                err_body.get("error", {})
-                                .get("details", [{}])[0]
-                                .get("retryInfo", {})
-                                .get("retryDelay", {})
-                                .get("seconds", wait)
-                            )
-                            wait = min(int(retry_seconds), 30)  # cap at 30s
-                        except Exception:
-                            pass
-
-                        logger.warning(
-                            f"⏳ 429 on '{model_name}' (attempt {attempt + 1}/{max_retries}), "
-                            f"waiting {wait}s before retry…"
-                        )
-                        await asyncio.sleep(wait)
-                        continue
-                    else:
-                        raise RateLimitError(
-                            f"429 rate limit exhausted after {max_retries} retries for '{model_name}'"
+        client = open_http_client()
+
+        for attempt in range(max_retries + 1):
+            response = await client.post(url, json=body)
+
+            if response.status_code == 200:
+                return self._extract_text(response.json(), model_name)
+
+            if response.status_code == 429:
+                if attempt < max_retries:
+                    # Try to read retry-after from response
+                    wait = delay * (2 ** attempt)
+                    try:
+                        err_body = response.json()
+                        # Gemini 429 body contains retry_delay.seconds
+                        retry_seconds = (
+                            err_body.get("error", {})
+                            .get("details", [{}])[0]
+                            .get("retryInfo", {})
+                            .get("retryDelay", {})
+                            .get("seconds", wait)
                         )
+                        wait = min(int(retry_seconds), 30)  # cap at 30s
+                    except Exception:
+                        pass
 
-                if response.status_code == 404:
-                    raise ModelNotFoundError(
-                        f"404 model '{model_name}' not found on v1 API"
+                    logger.warning(
+                        f"⏳ 429 on '{model_name}' (attempt {attempt + 1}/{max_retries}), "
+                        f"waiting {wait}s before retry…"
                     )
+                    await asyncio.sleep(wait)
+                    continue
+                else:
+                    raise RateLimitError(
+                        f"429 rate limit exhausted after {max_retries} retries for '{model_name}'"
+                    )
+
+            if response.status_code == 404:
+                raise ModelNotFoundError(
+                    f"404 model '{model_name}' not found on v1 API"
+                )
 
-                # Any other error — raise immediately
-                try:
-                    err_msg = response.json().get("error", {}).get("message", response.text)
-                except Exception:
-                    err_msg = response.text
-                raise Exception(f"Gemini API error {response.status_code}: {err_msg}")
+            # Any other error — raise immediately
+            try:
+                err_msg = response.json().get("error", {}).get("message", response.text)
+            except Exception:
+                err_msg = response.text
+            raise Exception(f"Gemini API error {response.status_code}: {err_msg}")
 
         raise Exception("Unexpected exit from retry loop")
 
@@ -170,11 +170,38 @@ Supports: Google Gemini, Anthropic Claude, OpenAI GPT
 """
 
 import os
+import re
+import asyncio
 import logging
-from typing import Optional
+from typing import Any, Optional
+
+import orjson
 
 logger = logging.getLogger("gift_ai.llm_client")
 
+# Body of the first ``` / ```json fenced block in an LLM response
+_FENCE_RE = re.compile(r"```(?:json)?\s*([\s\S]*?)```")
+
+
+def parse_model_json(text: str) -> Any:
+    """
+    Parse JSON out of a model response. Bare JSON (what the prompts ask for)
+    goes straight to orjson; fenced or prose-wrapped output falls back to the
+    fence regex and the outermost {...} span. Raises orjson.JSONDecodeError
+    if nothing parses.
+    """
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        pass
+    m = _FENCE_RE.search(text)
+    if m:
+        text = m.group(1)
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        text = text[start:end + 1]
+    return orjson.loads(text.strip())
+
 # NEW
 GEMINI_MODEL_CHAIN = [
     "gemini-2.0-flash-lite",
@@ -194,6 +221,7 @@ class LLMClient:
         self.genai = None
         self.anthropic = None
         self.openai = None
+        self._gemini_models = {}
 
         self._initialize_providers()
 
@@ -206,6 +234,7 @@ class LLMClient:
                 import google.generativeai as genai
                 genai.configure(api_key=self.google_api_key)
                 self.genai = genai
+                self._gemini_models = {name: genai.GenerativeModel(name) for name in GEMINI_MODEL_CHAIN}
                 logger.info("✅ Google Gemini initialized")
             except Exception as e:
                 logger.warning(f"⚠️ Gemini initialization failed: {e}")
@@ -273,10 +302,10 @@ class LLMClient:
         FIXED: tries multiple models instead of hardcoding gemini-1.5-flash-001.
         """
         last_error = None
-        for model_name in GEMINI_MODEL_CHAIN:
+        for model_name, model in self._gemini_models.items():
             try:
-                model = self.genai.GenerativeModel(model_name)
-                response = model.generate_content(
+                response = await asyncio.to_thread(
+                    model.generate_content,
                     prompt,
                     generation_config={
                         'max_output_tokens': max_tokens,
@@ -334,4 +363,15 @@ class LLMClient:
 
     def is_available(self) -> bool:
         """Check if any LLM provider is available"""
-        return any([self.genai, self.anthropic, self.openai])
\ No newline at end of file
+        return any([self.genai, self.anthropic, self.openai])
+
+
+# Shared across modules and requests so the Gemini models are built only once
+_llm_client: Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    global _llm_client
+    if _llm_client is None:
+        _llm_client = LLMClient()
+    return _llm_client
@@ -9,18 +9,47 @@ import logging
 import uuid
 import traceback
 import asyncio
-from typing import Dict, Any, List
+import orjson
+from typing import Dict, Any, List, Callable, Optional
 from core.vector_store import VectorStore
-from core.llm_client import LLMClient
+from core.llm_client import LLMClient, parse_model_json
 from core.config import settings
 from services.gift_bundle_service import GiftBundleService
 from services.gift_intent_service import extract_intent
 from services.gift_retrieval_service import retrieve_similar
 from services.gift_validation_service import validate_items
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Single comprehensive vision analysis prompt
+VISION_ANALYSIS_PROMPT = """Analyze this handmade craft/artwork image comprehensively and return detailed analysis.
+
+Return ONLY a valid JSON object (no markdown, no extra text):
+{
+    "craft_type": "specific craft category (pottery/textile/metalwork/painting/sculpture/woodwork/jewelry/decorative/other)",
+    "quality": "high|medium|low based on visible craftsmanship",
+    "price_range_inr": "estimated range like 500-1500",
+    "estimated_price": numeric_value_in_rupees,
+    "fraud_score": number_0_to_1,
+    "is_suspicious": boolean,
+    "packaging": "specific packaging recommendation",
+    "material": "primary material identified from image",
+    "sentiment": "aesthetic feel (warm/playful/elegant/traditional/modern/rustic)",
+    "emotion": "emotional quality (joyful/peaceful/energetic/nostalgic/sophisticated)",
+    "occasion": "best gifting occasion (birthday/wedding/diwali/holi/anniversary/housewarming/graduation/general)"
+}
+
+Analysis guidelines:
+- Craft type: Identify the specific craft category from visual inspection
+- Quality: Assess based on finish quality, symmetry, detail work, professional appearance
+- Price: Estimate based on materials visible, apparent size, quality level, and Indian handmade craft market
+- Fraud score: Analyze for authenticity (0.0=authentic craft, 1.0=highly suspicious/stock photo/AI generated)
+- Packaging: Recommend based on fragility, presentation needs, item type
+- Material: Identify from visual cues like texture, color, reflectivity, pattern
+- Sentiment/Emotion: Capture the aesthetic style and emotional appeal
+- Occasion: Determine best gifting occasion from design elements and cultural context"""
+
+
 class GiftOrchestrator:
     """Main orchestrator supporting both image and text-based gift recommendations"""
     
@@ -30,55 +59,96 @@ class GiftOrchestrator:
         self.bundle_service = GiftBundleService()
         logger.info("✅ GiftOrchestrator initialized")
 
-    async def refresh_vector_store(self) -> Dict[str, Any]:
-        """Refresh Qdrant with latest MongoDB items"""
+    async def refresh_vector_store(
+        self,
+        limit: Optional[int] = 100,
+        batch_size: int = 256,
+        on_batch: Optional[Callable[[int, int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Refresh Qdrant with latest MongoDB items.
+        Items are streamed from Mongo in batches of *batch_size* and each batch is
+        uploaded as soon as it's read; *on_batch(batch_no, uploaded_so_far)* is
+        called after every upload.
+        """
         try:
             logger.info("🔄 Starting vector store refresh...")
             
             if self.vector_store.mongo_collection is None:
                 return {"success": False, "error": "MongoDB not connected", "step": "mongodb_check"}
             
+            # Collection setup doesn't depend on the items: start it now, overlap with the Mongo fetch
+            collection_task = None
+            if self.vector_store.qdrant_client is not None:
+                logger.info("🔧 Setting up Qdrant collection...")
+                collection_task = asyncio.create_task(self.vector_store.setup_collection())
+            
             logger.info("📦 Fetching items from MongoDB...")
+            batches = self.vector_store.stream_mongo_items(batch_size=batch_size, limit=limit)
             try:
-                items = await self.vector_store.get_mongo_items(limit=100)
-                logger.info(f"✅ Fetched {len(items)} items from MongoDB")
+                items = await batches.__anext__()
+            except StopAsyncIteration:
+                items = []
             except Exception as e:
                 logger.error(f"❌ MongoDB fetch failed: {str(e)}")
                 traceback.print_exc()
+                await self._discard_task(collection_task)
                 return {"success": False, "error": f"MongoDB fetch failed: {str(e)}", "step": "mongodb_fetch"}
             
             if not items:
+                await self._discard_task(collection_task)
                 return {"success": False, "error": "No items found in MongoDB", "step": "mongodb_empty"}
             
-            if self.vector_store.qdrant_client is None:
+            if collection_task is None:
                 return {"success": False, "error": "Qdrant not connected", "step": "qdrant_check"}
             
-            logger.info("🔧 Setting up Qdrant collection...")
             try:
-                await self.vector_store.setup_collection()
+                await collection_task
                 logger.info("✅ Qdrant collection ready")
             except Exception as e:
                 logger.error(f"❌ Qdrant setup failed: {str(e)}")
                 traceback.print_exc()
                 return {"success": False, "error": f"Qdrant setup failed: {str(e)}", "step": "qdrant_setup"}
             
-            logger.info(f"📤 Uploading {len(items)} items to Qdrant...")
-            try:
-                await self.vector_store.upload_items(items)
-                logger.info(f"✅ Successfully uploaded {len(items)} items")
-            except Exception as e:
-                logger.error(f"❌ Qdrant upload failed: {str(e)}")
-                traceback.print_exc()
-                return {"success": False, "error": f"Qdrant upload failed: {str(e)}", "step": "qdrant_upload"}
+            uploaded = 0
+            batch_no = 0
+            while items:
+                batch_no += 1
+                logger.info(f"📤 Uploading batch {batch_no} ({len(items)} items) to Qdrant...")
+                try:
+                    await self.vector_store.upload_items(items, start_id=uploaded + 1)
+                except Exception as e:
+                    logger.error(f"❌ Qdrant upload failed: {str(e)}")
+                    traceback.print_exc()
+                    return {"success": False, "error": f"Qdrant upload failed: {str(e)}", "step": "qdrant_upload"}
+                uploaded += len(items)
+                logger.info(f"✅ Batch {batch_no} done, {uploaded} items uploaded so far")
+                if on_batch:
+                    on_batch(batch_no, uploaded)
+                
+                try:
+                    items = await batches.__anext__()
+                except StopAsyncIteration:
+                    items = []
+                except Exception as e:
+                    logger.error(f"❌ MongoDB fetch failed: {str(e)}")
+                    traceback.print_exc()
+                    return {"success": False, "error": f"MongoDB fetch failed: {str(e)}", "step": "mongodb_fetch"}
             
             logger.info(f"✅ Vector store refresh completed successfully")
-            return {"success": True, "message": f"Refreshed vector store with {len(items)} items", "items_count": len(items)}
+            return {"success": True, "message": f"Refreshed vector store with {uploaded} items", "items_count": uploaded}
             
         except Exception as e:
             logger.error(f"❌ Unexpected error: {str(e)}")
             traceback.print_exc()
             return {"success": False, "error": f"Unexpected error: {str(e)}", "step": "unknown"}
 
+    @staticmethod
+    async def _discard_task(task) -> None:
+        """Wait out a background step whose result is no longer needed."""
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+
     async def generate_bundle(self, image_bytes: bytes, filename: str = "upload.jpg") -> Dict[str, Any]:
         """Full GenAI pipeline for image-based gift recommendations"""
         bundle_id = str(uuid.uuid4())
@@ -179,54 +249,11 @@ class GiftOrchestrator:
                     "error": "Vision client not initialized - check Gemini API configuration"
                 }
             
-            # Single comprehensive vision analysis prompt
-            prompt = """Analyze this handmade craft/artwork image comprehensively and return detailed analysis.
-
-Return ONLY a valid JSON object (no markdown, no extra text):
-{
-    "craft_type": "specific craft category (pottery/textile/metalwork/painting/sculpture/woodwork/jewelry/decorative/other)",
-    "quality": "high|medium|low based on visible craftsmanship",
-    "price_range_inr": "estimated range like 500-1500",
-    "estimated_price": numeric_value_in_rupees,
-    "fraud_score": number_0_to_1,
-    "is_suspicious": boolean,
-    "packaging": "specific packaging recommendation",
-    "material": "primary material identified from image",
-    "sentiment": "aesthetic feel (warm/playful/elegant/traditional/modern/rustic)",
-    "emotion": "emotional quality (joyful/peaceful/energetic/nostalgic/sophisticated)",
-    "occasion": "best gifting occasion (birthday/wedding/diwali/holi/anniversary/housewarming/graduation/general)"
-}
-
-Analysis guidelines:
-- Craft type: Identify the specific craft category from visual inspection
-- Quality: Assess based on finish quality, symmetry, detail work, professional appearance
-- Price: Estimate based on materials visible, apparent size, quality level, and Indian handmade craft market
-- Fraud score: Analyze for authenticity (0.0=authentic craft, 1.0=highly suspicious/stock photo/AI generated)
-- Packaging: Recommend based on fragility, presentation needs, item type
-- Material: Identify from visual cues like texture, color, reflectivity, pattern
-- Sentiment/Emotion: Capture the aesthetic style and emotional appeal
-- Occasion: Determine best gifting occasion from design elements and cultural context"""
-            
             logger.info("🎨 Calling Gemini Vision for comprehensive analysis...")
-            response = await vision_client.analyze_image(image_bytes, prompt)
-            
-            # Parse JSON response
-            import json
-            import re
-            
-            # Extract JSON from markdown if present
-            clean_text = response.strip()
-            if '```json' in clean_text:
-                clean_text = clean_text.split('```json')[1].split('```')[0]
-            elif '```' in clean_text:
-                clean_text = clean_text.split('```')[1].split('```')[0]
-            
-            # Find JSON object
-            json_match = re.search(r'\{.*\}', clean_text, re.DOTALL)
-            if json_match:
-                clean_text = json_match.group(0)
+            response = await vision_client.analyze_image(image_bytes, VISION_ANALYSIS_PROMPT)
             
-            data = json.loads(clean_text.strip())
+            # Parse JSON response (bare, fenced or wrapped in prose)
+            data = parse_model_json(response)
             
             logger.info(f"✅ Vision analysis: {data.get('craft_type', 'N/A')} - {data.get('quality', 'N/A')} quality - ₹{data.get('estimated_price', 'N/A')}")
             
@@ -246,7 +273,7 @@ Analysis guidelines:
                 "occasion_hint": data.get("occasion")
             }
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"❌ JSON parse error: {e}")
             if 'response' in locals():
                 logger.error(f"   Raw response excerpt: {response[:200]}")
@@ -294,4 +321,4 @@ Analysis guidelines:
         except Exception as e:
             logger.error(f"❌ Query processing failed: {e}")
             traceback.print_exc()
-            return {'query': user_intent, 'bundles': [], 'error': f'Processing failed: {str(e)}'}
\ No newline at end of file
+            return {'query': user_intent, 'bundles': [], 'error': f'Processing failed: {str(e)}'}
@@ -8,16 +8,46 @@ FIXED: Removed mock data fallback - always use real MongoDB
 FIXED: Removed boolean truth-value check on Qdrant collection response objects
 """
 
+import asyncio
 import logging
+import os
 import requests
-from typing import List, Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from typing import AsyncIterator, List, Dict, Any, Optional
 from motor.motor_asyncio import AsyncIOMotorClient
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams, PointStruct
+from qdrant_client.http.models import (
+    Distance, VectorParams, PointStruct, SearchParams,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, QuantizationSearchParams,
+)
 from core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Embedding fan-out for uploads: texts per batched embed call, and max calls in flight
+EMBED_CHUNK_SIZE = 32
+EMBED_CONCURRENCY = 8
+
+# Keep-alive session for the local Ollama embedding fallback (one socket per worker, not per call)
+_ollama_http = requests.Session()
+_ollama_http.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
+
+# int8 scalar quantization: HNSW traversal runs on 1-byte quantized vectors kept in RAM,
+# top candidates are rescored against the on-disk float32 originals.
+QUANTIZATION_CONFIG = ScalarQuantization(
+    scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+)
+# HNSW beam width at query time (None = collection default); raise for recall, lower for latency
+QDRANT_HNSW_EF = int(os.getenv("QDRANT_HNSW_EF", "0")) or None
+QUANTIZED_SEARCH_PARAMS = SearchParams(
+    hnsw_ef=QDRANT_HNSW_EF,
+    quantization=QuantizationSearchParams(ignore=False, rescore=True, oversampling=2.0)
+)
+
+# Drop hits below this similarity inside Qdrant, so weak matches never reach rescoring
+# or the bundle prompt (unset = return the full top-k)
+_score_threshold = os.getenv("SEARCH_SCORE_THRESHOLD", "")
+SEARCH_SCORE_THRESHOLD = float(_score_threshold) if _score_threshold else None
 
 class VectorStore:
     """Unified vector store with real embeddings and async operations"""
@@ -67,7 +97,7 @@ class VectorStore:
 
             # ✅ FIX: test connection by fetching collection names as a list
             # Never do `if response:` — Qdrant objects don't support bool()
-            collections_response = self.qdrant_client.get_collections()
+            collections_response = await asyncio.to_thread(self.qdrant_client.get_collections)
             _ = [col.name for col in collections_response.collections]  # just validate
             logger.info("✅ Qdrant connected")
 
@@ -95,7 +125,7 @@ class VectorStore:
     def _test_ollama_connection(self) -> bool:
         """Test if Ollama is available at localhost:11434"""
         try:
-            response = requests.get("http://localhost:11434/api/tags", timeout=5)
+            response = _ollama_http.get("http://localhost:11434/api/tags", timeout=5)
             if response.status_code == 200:
                 logger.info("✅ Ollama available as fallback")
                 return True
@@ -122,12 +152,12 @@ class VectorStore:
                 logger.debug("Generated embedding using Gemini")
                 return embedding
             except Exception as e:
-                logger.warning(f"Gemini embedding failed: {e}, trying Ollama…")
+                logger.warning("Gemini embedding failed: %s, trying Ollama…", e)
 
         # 2. Ollama
         if self.ollama_available:
             try:
-                response = requests.post(
+                response = _ollama_http.post(
                     "http://localhost:11434/api/embeddings",
                     json={"model": "nomic-embed-text", "prompt": text},
                     timeout=30,
@@ -137,11 +167,54 @@ class VectorStore:
                     logger.debug("Generated embedding using Ollama")
                     return embedding
             except Exception as e:
-                logger.warning(f"Ollama embedding failed: {e}, using simple fallback…")
+                logger.warning("Ollama embedding failed: %s, using simple fallback…", e)
 
         # 3. Simple fallback
         return self._generate_simple_embedding(text)
 
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several texts at once.
+        Gemini takes the whole list in one request; otherwise falls back to
+        generate_embedding per text.
+        """
+        if self.genai and texts:
+            try:
+                result = self.genai.embed_content(
+                    model="models/embedding-001",
+                    content=texts,
+                    task_type="retrieval_document",
+                )
+                embeddings = result["embedding"]
+                if len(embeddings) == len(texts):
+                    logger.debug("Generated %d embeddings using Gemini (batched)", len(texts))
+                    return embeddings
+            except Exception as e:
+                logger.warning("Gemini batch embedding failed: %s, embedding one by one…", e)
+
+        return [self.generate_embedding(text) for text in texts]
+
+    @staticmethod
+    def _fit_dims(embedding: List[float], dims: int = 768) -> List[float]:
+        """Truncate or zero-pad an embedding to the collection's vector size."""
+        if len(embedding) > dims:
+            return embedding[:dims]
+        if len(embedding) < dims:
+            return embedding + [0.0] * (dims - len(embedding))
+        return embedding
+
+    @staticmethod
+    def _hit_to_item(r) -> Dict:
+        return {
+            "id": str(r.id),
+            "title": r.payload.get("title", ""),
+            "description": r.payload.get("description", ""),
+            "category": r.payload.get("category", ""),
+            "price": r.payload.get("price", 0),
+            "score": r.score,
+            "mongo_id": r.payload.get("mongo_id", ""),
+        }
+
     def _generate_simple_embedding(self, text: str) -> List[float]:
         """Simple character-based 768-dim fallback embedding"""
         text = text.lower()
@@ -178,6 +251,21 @@ class VectorStore:
             self.mongo_client.close()
             logger.info("MongoDB connection closed")
 
+    _PUBLISHED_FILTER = {
+        "status": "published",
+        "title": {"$exists": True},
+        "description": {"$exists": True},
+    }
+
+    @staticmethod
+    def _normalise_doc(doc: Dict) -> Dict:
+        doc["_id"] = str(doc["_id"])
+        doc.setdefault("title", "Unknown Item")
+        doc.setdefault("description", "No description")
+        doc.setdefault("category", "General")
+        doc.setdefault("price", 0)
+        return doc
+
     async def get_mongo_items(self, limit: int = 100) -> List[Dict]:
         """
         Fetch published items from MongoDB asynchronously.
@@ -187,22 +275,11 @@ class VectorStore:
             raise Exception("MongoDB not connected - cannot fetch items")
 
         try:
-            cursor = self.mongo_collection.find(
-                {
-                    "status": "published",
-                    "title": {"$exists": True},
-                    "description": {"$exists": True},
-                }
-            ).limit(limit)
+            cursor = self.mongo_collection.find(self._PUBLISHED_FILTER).limit(limit)
 
             items: List[Dict] = []
             async for doc in cursor:
-                doc["_id"] = str(doc["_id"])
-                doc.setdefault("title", "Unknown Item")
-                doc.setdefault("description", "No description")
-                doc.setdefault("category", "General")
-                doc.setdefault("price", 0)
-                items.append(doc)
+                items.append(self._normalise_doc(doc))
 
             logger.info(f"📦 Retrieved {len(items)} published artworks from MongoDB")
 
@@ -218,6 +295,30 @@ class VectorStore:
             logger.error(f"❌ Error fetching MongoDB items: {e}")
             raise
 
+    async def stream_mongo_items(
+        self, batch_size: int = 256, limit: Optional[int] = None
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Yield published items from MongoDB in lists of up to *batch_size*,
+        so callers can embed/upload while the cursor is still being read.
+        Raises if MongoDB is not connected.
+        """
+        if self.mongo_collection is None:
+            raise Exception("MongoDB not connected - cannot fetch items")
+
+        cursor = self.mongo_collection.find(self._PUBLISHED_FILTER, batch_size=batch_size)
+        if limit:
+            cursor = cursor.limit(limit)
+
+        batch: List[Dict] = []
+        async for doc in cursor:
+            batch.append(self._normalise_doc(doc))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
     async def setup_collection(self, collection_name: str = None) -> bool:
         """
         Create Qdrant collection if it does not already exist.
@@ -232,13 +333,16 @@ class VectorStore:
 
         try:
             # ✅ CORRECT: extract names into a plain list before any comparison
-            collections_response = self.qdrant_client.get_collections()
+            # Sync Qdrant client: run in a thread so callers can overlap this with other I/O
+            collections_response = await asyncio.to_thread(self.qdrant_client.get_collections)
             existing_names = [col.name for col in collections_response.collections]
 
             if collection_name not in existing_names:
-                self.qdrant_client.create_collection(
+                await asyncio.to_thread(
+                    self.qdrant_client.create_collection,
                     collection_name=collection_name,
-                    vectors_config=VectorParams(size=768, distance=Distance.COSINE),
+                    vectors_config=VectorParams(size=768, distance=Distance.COSINE, on_disk=True),
+                    quantization_config=QUANTIZATION_CONFIG,
                 )
                 logger.info(f"✅ Created Qdrant collection: {collection_name}")
             else:
@@ -251,9 +355,12 @@ class VectorStore:
             raise
 
     async def upload_items(
-        self, items: List[Dict], collection_name: str = None
+        self, items: List[Dict], collection_name: str = None, start_id: int = 1
     ) -> bool:
-        """Upload items to Qdrant with real embeddings."""
+        """
+        Upload items to Qdrant with real embeddings.
+        Point ids run from *start_id*; pass a running offset when uploading in batches.
+        """
         if self.qdrant_client is None:
             raise Exception("Qdrant not connected - cannot upload items")
 
@@ -266,23 +373,31 @@ class VectorStore:
         try:
             points: List[PointStruct] = []
 
-            for index, item in enumerate(items):
-                text = f"{item.get('title', '')} {item.get('description', '')}"
-                embedding = self.generate_embedding(text)
+            # Embed in chunks, several chunks in flight at once
+            texts = [f"{item.get('title', '')} {item.get('description', '')}" for item in items]
+            sem = asyncio.Semaphore(EMBED_CONCURRENCY)
 
+            async def _embed_chunk(chunk: List[str]) -> List[List[float]]:
+                async with sem:
+                    return await asyncio.to_thread(self.generate_embeddings, chunk)
+
+            chunks = await asyncio.gather(*(
+                _embed_chunk(texts[i:i + EMBED_CHUNK_SIZE])
+                for i in range(0, len(texts), EMBED_CHUNK_SIZE)
+            ))
+            embeddings = [e for chunk in chunks for e in chunk]
+
+            for index, (item, embedding) in enumerate(zip(items, embeddings)):
                 if not embedding:
-                    logger.warning(f"⚠️ Skipping item {index}: no embedding generated")
+                    logger.warning("⚠️ Skipping item %d: no embedding generated", index)
                     continue
 
                 # Normalise to 768-dim
-                if len(embedding) > 768:
-                    embedding = embedding[:768]
-                elif len(embedding) < 768:
-                    embedding.extend([0.0] * (768 - len(embedding)))
+                embedding = self._fit_dims(embedding)
 
                 points.append(
                     PointStruct(
-                        id=index + 1,
+                        id=start_id + index,
                         vector=embedding,
                         payload={
                             "title": item.get("title", ""),
@@ -293,11 +408,12 @@ class VectorStore:
                         },
                     )
                 )
-                logger.debug(f"  ✓ Prepared: {item.get('title', 'Unknown')}")
+                logger.debug("  ✓ Prepared: %s", item.get('title', 'Unknown'))
 
             if points:
-                self.qdrant_client.upsert(
-                    collection_name=collection_name, points=points
+                # QdrantClient is synchronous; keep its HTTP round trips off the event loop
+                await asyncio.to_thread(
+                    self.qdrant_client.upsert, collection_name=collection_name, points=points
                 )
                 logger.info(f"✅ Uploaded {len(points)} items to Qdrant")
                 return True
@@ -324,35 +440,25 @@ class VectorStore:
         collection_name = collection_name or self.collection_name
 
         try:
-            query_embedding = self.generate_embedding(text)
+            # embedding hits Gemini/Ollama over blocking HTTP; keep it off the event loop
+            query_embedding = await asyncio.to_thread(self.generate_embedding, text)
             if not query_embedding:
                 logger.error("❌ Failed to generate query embedding")
                 return []
 
             # Normalise to 768-dim
-            if len(query_embedding) > 768:
-                query_embedding = query_embedding[:768]
-            elif len(query_embedding) < 768:
-                query_embedding.extend([0.0] * (768 - len(query_embedding)))
+            query_embedding = self._fit_dims(query_embedding)
 
-            results = self.qdrant_client.search(
+            results = await asyncio.to_thread(
+                self.qdrant_client.search,
                 collection_name=collection_name,
                 query_vector=query_embedding,
                 limit=limit,
+                search_params=QUANTIZED_SEARCH_PARAMS,
+                score_threshold=SEARCH_SCORE_THRESHOLD,
             )
 
-            items = [
-                {
-                    "id": str(r.id),
-                    "title": r.payload.get("title", ""),
-                    "description": r.payload.get("description", ""),
-                    "category": r.payload.get("category", ""),
-                    "price": r.payload.get("price", 0),
-                    "score": r.score,
-                    "mongo_id": r.payload.get("mongo_id", ""),
-                }
-                for r in results
-            ]
+            items = [self._hit_to_item(r) for r in results]
 
             logger.info(f"🔍 Found {len(items)} similar items for query: '{text}'")
             return items
@@ -361,4 +467,4 @@ class VectorStore:
             logger.error(f"❌ Search failed: {e}")
             import traceback
             traceback.print_exc()
-            raise
\ No newline at end of file
+            raise
@@ -18,16 +18,29 @@ Port: 8001
 # ========================================================================
 import os
 import io
-import json
-import re
+import hashlib
 import logging
+import queue
+import shutil
 import traceback
 import uuid
 import asyncio
+import time
 from pathlib import Path
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+import orjson
+
+# SIMD xxh3 for image cache keys when available; blake2b otherwise
+try:
+    import xxhash
+except Exception:
+    xxhash = None
+
 from dotenv import load_dotenv
 
 env_path = Path(__file__).parent / ".env"
@@ -37,15 +50,22 @@ if env_path.exists():
 # ========================================================================
 # IMPORTS
 # ========================================================================
-from fastapi import FastAPI, UploadFile, File, HTTPException, Query
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, ConfigDict, ValidationError
 from contextlib import asynccontextmanager
 from PIL import Image
 import google.generativeai as genai
 
 from core.config import settings
-from core.llm_client import LLMClient
+from core.llm_client import get_llm_client, parse_model_json
+from core import gemini_client
+from services.gift_bundle_service import (
+    ENABLE_OLLAMA, GiftBundleService, open_ollama_client, close_ollama_client,
+    _extract_recipient,
+)
 
 # ========================================================================
 # LOGGING
@@ -56,6 +76,34 @@ logging.basicConfig(
 )
 logger = logging.getLogger("gift_ai.main")
 
+# While the app runs, root handlers are swapped for a QueueHandler. Records are
+# still formatted on the calling thread (QueueHandler.prepare), but the stream
+# writes and handler locks move to the listener thread, off the event loop.
+_log_listener: Optional[QueueListener] = None
+_direct_log_handlers: List[logging.Handler] = []
+
+
+def start_queue_logging() -> None:
+    """Route root logging through a queue. Called from lifespan startup."""
+    global _log_listener, _direct_log_handlers
+    if _log_listener is not None:
+        return
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    _direct_log_handlers = list(logging.root.handlers)
+    _log_listener = QueueListener(log_queue, *_direct_log_handlers, respect_handler_level=True)
+    logging.root.handlers = [QueueHandler(log_queue)]
+    _log_listener.start()
+
+
+def stop_queue_logging() -> None:
+    """Flush queued records and restore the direct handlers. Called on shutdown."""
+    global _log_listener
+    if _log_listener is None:
+        return
+    _log_listener.stop()  # flushes queued records
+    logging.root.handlers = _direct_log_handlers
+    _log_listener = None
+
 # ========================================================================
 # MODEL FALLBACK CHAIN
 # FIXED: v1-compatible model names (old bare names only worked on deprecated v1beta)
@@ -73,12 +121,6 @@ GEMINI_V1BETA_BASE = "https://generativelanguage.googleapis.com/v1beta/models"
 # ========================================================================
 # RECIPIENT-AWARE FILTERING HELPERS
 # ========================================================================
-MALE_ONLY_KEYWORDS  = ["men's", "mens", "male", "suit", "tie", "necktie", "cufflink", "shaving kit"]
-FEMALE_ONLY_KEYWORDS = ["women's", "womens", "female", "saree", "kurti", "dupatta", "bra", "lipstick"]
-
-FEMALE_RECIPIENTS = {"mom", "mother", "sister", "wife", "girlfriend", "aunt", "grandmother", "grandma"}
-MALE_RECIPIENTS   = {"dad", "father", "brother", "husband", "boyfriend", "uncle", "grandfather", "grandpa"}
-
 RECIPIENT_SEARCH_TERMS = {
     "mom":        "women feminine gift kurti home decor",
     "mother":     "women feminine gift kurti home decor",
@@ -91,41 +133,141 @@ RECIPIENT_SEARCH_TERMS = {
     "husband":    "men masculine watch wallet accessories",
     "boyfriend":  "men masculine accessories gadgets",
 }
+# Recipient detection (_extract_recipient) is shared with services.gift_bundle_service
 
 
-def _extract_recipient(text: str) -> str:
-    text_lower = text.lower()
-    for key in list(FEMALE_RECIPIENTS) + list(MALE_RECIPIENTS) + ["friend", "colleague", "self", "anyone"]:
-        if key in text_lower:
-            return key
-    return "anyone"
-
-
-def _is_item_appropriate(item: Dict, recipient: str) -> bool:
-    combined = (item.get("title", "") + " " + item.get("description", "")).lower()
-    if recipient in FEMALE_RECIPIENTS:
-        if any(kw in combined for kw in MALE_ONLY_KEYWORDS):
-            logger.info(f"  🚫 Filtered out '{item.get('title')}' — male item for female recipient")
-            return False
-    if recipient in MALE_RECIPIENTS:
-        if any(kw in combined for kw in FEMALE_ONLY_KEYWORDS):
-            logger.info(f"  🚫 Filtered out '{item.get('title')}' — female item for male recipient")
-            return False
-    return True
-
+# ========================================================================
+# VISION PROMPTS
+# Every vision prompt starts with the same byte-identical prefix and only the
+# trailing TASK differs, so backends with prefix caching can reuse the shared
+# part across endpoints. Do not reformat VISION_PROMPT_PREFIX, and keep the
+# prompt as the first part sent to the model.
+# ========================================================================
+VISION_PROMPT_PREFIX = (
+    "You are a product-analysis assistant for an Indian handmade craft marketplace.\n"
+    "Look at the attached image and complete the task below.\n"
+    "Return ONLY a valid JSON object (no markdown, no extra text) using the schema given in the task.\n"
+    "---\n"
+    "TASK: "
+)
 
-def _filter_items_by_recipient(items: List[Dict], user_intent: str) -> List[Dict]:
-    recipient = _extract_recipient(user_intent)
-    if recipient in {"anyone", "friend", "colleague", "self", ""}:
-        return items
-    filtered = [i for i in items if _is_item_appropriate(i, recipient)]
-    logger.info(f"🎯 Recipient='{recipient}': {len(items)} items → {len(filtered)} after gender filter")
-    return filtered if filtered else items  # never return empty
+# Single-call analysis used by the bundle pipeline
+FULL_VISION_PROMPT = VISION_PROMPT_PREFIX + """Analyze this handmade craft/artwork image comprehensively. JSON schema:
+{
+    "craft_type": "pottery|textile|metalwork|painting|sculpture|woodwork|jewelry|decorative|other",
+    "quality": "high|medium|low",
+    "price_range_inr": "500-1500",
+    "estimated_price": 1000,
+    "fraud_score": 0.1,
+    "is_suspicious": false,
+    "packaging": "eco-friendly box",
+    "material": "clay",
+    "sentiment": "warm|playful|elegant|traditional|modern|rustic",
+    "emotion": "joyful|peaceful|energetic|nostalgic|sophisticated",
+    "occasion": "birthday|wedding|diwali|holi|anniversary|housewarming|graduation|general"
+}"""
 
 
 # ========================================================================
 # VISION AI CLIENT
 # ========================================================================
+def image_key(image_bytes: bytes) -> bytes:
+    """16-byte content hash for cache and single-flight keys."""
+    if xxhash is not None:
+        return xxhash.xxh3_128_digest(image_bytes)
+    return hashlib.blake2b(image_bytes, digest_size=16).digest()
+
+
+def image_mime_type(image_bytes: bytes) -> Optional[str]:
+    """
+    Sniff the image format from its magic bytes. Returns None for anything
+    Gemini doesn't take as-is (GIF, BMP, TIFF, ...).
+    """
+    if image_bytes.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if image_bytes.startswith(b"\x89PNG"):
+        return "image/png"
+    if image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
+        return "image/webp"
+    if image_bytes[4:12] in (b"ftypheic", b"ftypheix", b"ftypmif1"):
+        return "image/heic"
+    return None
+
+
+# Vision models downscale to ~1k px internally; don't ship pixels they'll throw away
+VISION_MAX_SIDE = 1024
+VISION_DOWNSCALE_MIN_BYTES = 256 * 1024
+
+# Pillow work (downscale, dHash) runs here rather than the default executor, which
+# also serves the blocking Qdrant/embedding calls. Pillow drops the GIL while decoding
+# and resampling, so threads are enough. Created in lifespan startup and shut down
+# with it, so a later lifespan in the same process gets a fresh pool.
+PREPROCESS_WORKERS = int(os.getenv("VISION_PREPROCESS_WORKERS", "4"))
+_preprocess_pool: Optional[ThreadPoolExecutor] = None
+
+
+def start_preprocess_pool() -> None:
+    global _preprocess_pool
+    if _preprocess_pool is None:
+        _preprocess_pool = ThreadPoolExecutor(
+            max_workers=PREPROCESS_WORKERS, thread_name_prefix="vision-prep",
+        )
+
+
+def stop_preprocess_pool() -> None:
+    global _preprocess_pool
+    if _preprocess_pool is not None:
+        _preprocess_pool.shutdown(wait=False)
+        _preprocess_pool = None
+
+
+async def run_preprocess(fn, *args):
+    # Outside the app lifespan (scripts, tests) there is no pool; use the default executor
+    return await asyncio.get_running_loop().run_in_executor(_preprocess_pool, fn, *args)
+
+
+def _jpeg_bytes(img: Image.Image) -> bytes:
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=85)
+    return buf.getvalue()
+
+
+def downscale_image(image_bytes: bytes, max_side: int = VISION_MAX_SIDE) -> bytes:
+    """Re-encode large uploads as JPEG with the long edge capped at max_side."""
+    if len(image_bytes) <= VISION_DOWNSCALE_MIN_BYTES:
+        return image_bytes
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        if max(img.size) <= max_side:
+            return image_bytes
+        img.draft("RGB", (max_side, max_side))  # JPEG: decode at reduced scale
+        img = img.convert("RGB")
+        img.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        return _jpeg_bytes(img)
+    except Exception as e:
+        logger.warning(f"⚠️ Downscale failed, sending original image: {e}")
+        return image_bytes
+
+
+def prepare_vision_image(image_bytes: bytes) -> Tuple[bytes, str]:
+    """
+    Bytes and MIME type to send to Gemini. Large uploads are downscaled;
+    formats Gemini doesn't accept directly are re-encoded as JPEG.
+    Raises ValueError if the image can't be decoded.
+    """
+    image_bytes = downscale_image(image_bytes)
+    mime_type = image_mime_type(image_bytes)
+    if mime_type is None:
+        try:
+            image_bytes = _jpeg_bytes(Image.open(io.BytesIO(image_bytes)))
+        except Exception as e:
+            raise ValueError(f"Unsupported image format: {e}") from e
+        mime_type = "image/jpeg"
+    return image_bytes, mime_type
+
+
 class VisionAIClient:
     """
     Vision AI client using genai library (v1beta) with correct model names.
@@ -140,42 +282,109 @@ class VisionAIClient:
         "gemini-2.5-flash",
     ]
 
+    # Last model that answered, per API key, so restarts skip known-exhausted models
+    MODEL_CACHE_DIR = Path(os.getenv("GIFT_AI_CACHE_DIR", Path.home() / ".cache" / "gift_ai"))
+
+    # Every vision prompt asks for JSON; JSON mode makes the model return it bare,
+    # so parse_model_json's first orjson.loads succeeds without regex recovery
+    JSON_GENERATION_CONFIG = genai.GenerationConfig(response_mime_type="application/json")
+
+    # Max Gemini Vision requests in flight per worker; keep under the key's quota
+    # so bursts queue here instead of coming back as 429s
+    UPSTREAM_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "16"))
+
     def __init__(self):
         self.gemini_api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
         self.gemini_model = None
         self.gemini_model_name = None
+        self._models: Dict[str, Any] = {}
+        # same key -> call already in flight; concurrent identical requests await it
+        self._inflight: "Dict[Tuple[bytes, str], asyncio.Future[str]]" = {}
+        self._upstream_sem = asyncio.Semaphore(self.UPSTREAM_CONCURRENCY)
 
         if self.gemini_api_key:
             try:
                 genai.configure(api_key=self.gemini_api_key)
-                for name in self.VISION_MODEL_CHAIN:
+                # Build each model once; analyze_image reuses them on every request.
+                # The cached working model (if any) goes first.
+                cached = self._read_cached_model()
+                chain = [cached] if cached in self.VISION_MODEL_CHAIN else []
+                chain += [m for m in self.VISION_MODEL_CHAIN if m != cached]
+                for name in chain:
                     try:
-                        self.gemini_model = genai.GenerativeModel(name)
-                        self.gemini_model_name = name
-                        logger.info(f"✅ VisionAIClient initialized with: {name}")
-                        break
+                        self._models[name] = genai.GenerativeModel(name)
                     except Exception:
                         continue
-                if not self.gemini_model:
+                if self._models:
+                    self.gemini_model_name, self.gemini_model = next(iter(self._models.items()))
+                    logger.info(f"✅ VisionAIClient initialized with: {self.gemini_model_name}")
+                else:
                     logger.error("❌ All vision models failed to initialize")
             except Exception as e:
                 logger.error(f"❌ VisionAIClient init failed: {e}")
         else:
             logger.warning("⚠️ No Gemini API key found")
 
+    def _model_cache_file(self) -> Path:
+        key_hash = hashlib.sha256(self.gemini_api_key.encode()).hexdigest()[:16]
+        return self.MODEL_CACHE_DIR / f"gemini_model_{key_hash}.txt"
+
+    def _read_cached_model(self) -> Optional[str]:
+        try:
+            return self._model_cache_file().read_text().strip() or None
+        except OSError:
+            return None
+
+    def _remember_model(self, model_name: str) -> None:
+        """Promote a model that just answered and persist it for the next start."""
+        if model_name == self.gemini_model_name:
+            return
+        self._models = {model_name: self._models[model_name],
+                        **{k: v for k, v in self._models.items() if k != model_name}}
+        self.gemini_model_name, self.gemini_model = model_name, self._models[model_name]
+        try:
+            path = self._model_cache_file()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(model_name)
+        except OSError as e:
+            logger.debug(f"Could not persist vision model choice: {e}")
+
     async def analyze_image(self, image_bytes: bytes, prompt: str) -> str:
         """Analyze image using Gemini Vision (genai library, v1beta endpoint)."""
         if not self.gemini_model:
             raise Exception("Gemini Vision not configured — check GOOGLE_API_KEY")
 
-        for model_name in self.VISION_MODEL_CHAIN:
+        # Repeat uploads are served from the parsed-result cache (_vision_results);
+        # raw replies aren't cached, so an unparseable one is retried next time
+        flight_key = (image_key(image_bytes), prompt)
+        future = self._inflight.get(flight_key)
+        if future is None:
+            future = asyncio.ensure_future(self._generate(image_bytes, prompt))
+            self._inflight[flight_key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(flight_key, None))
+        else:
+            logger.info("🔗 Joining in-flight vision call for identical image and prompt")
+        return await asyncio.shield(future)
+
+    async def _generate(self, image_bytes: bytes, prompt: str) -> str:
+        # Only oversized uploads and formats Gemini can't read are decoded (off the
+        # event loop) and re-encoded; everything else goes as the original bytes
+        try:
+            image_bytes, mime_type = await run_preprocess(prepare_vision_image, image_bytes)
+        except ValueError as e:
+            raise Exception(f"Vision analysis failed: {e}")
+        image_part = {"mime_type": mime_type, "data": image_bytes}
+        for model_name, model in list(self._models.items()):
             try:
-                model = genai.GenerativeModel(model_name)
-                image = Image.open(io.BytesIO(image_bytes))
-                response = model.generate_content([prompt, image])
+                # prompt goes first and unmodified to keep VISION_PROMPT_PREFIX cacheable
+                async with self._upstream_sem:
+                    response = await model.generate_content_async(
+                        [prompt, image_part], generation_config=self.JSON_GENERATION_CONFIG
+                    )
                 if not response or not response.text:
                     raise Exception("Empty response from Gemini Vision")
                 logger.info(f"✅ Vision analysis complete via {model_name}")
+                self._remember_model(model_name)
                 return response.text
             except Exception as e:
                 if "429" in str(e) or "quota" in str(e).lower():
@@ -195,6 +404,9 @@ from qdrant_client import QdrantClient
 from qdrant_client.http.models import Distance, VectorParams, PointStruct
 import requests
 
+# Quantization and search settings are shared with core.vector_store
+from core.vector_store import QUANTIZATION_CONFIG, QUANTIZED_SEARCH_PARAMS, SEARCH_SCORE_THRESHOLD
+
 
 class VectorStore:
     """Embedded Vector Store with real embeddings"""
@@ -238,7 +450,7 @@ class VectorStore:
                 timeout=10,
             )
             # ✅ FIX: never bool()-check Qdrant response — extract to plain list
-            collections_response = self.qdrant_client.get_collections()
+            collections_response = await asyncio.to_thread(self.qdrant_client.get_collections)
             _ = [col.name for col in collections_response.collections]
             logger.info("✅ Qdrant connected")
         except Exception as e:
@@ -295,14 +507,16 @@ class VectorStore:
             raise Exception("Qdrant not connected")
 
         try:
-            collections_response = self.qdrant_client.get_collections()
+            collections_response = await asyncio.to_thread(self.qdrant_client.get_collections)
             # ✅ FIX: plain list — no bool() on response object
             existing_names = [col.name for col in collections_response.collections]
 
             if self.collection_name not in existing_names:
-                self.qdrant_client.create_collection(
+                await asyncio.to_thread(
+                    self.qdrant_client.create_collection,
                     collection_name=self.collection_name,
-                    vectors_config=VectorParams(size=768, distance=Distance.COSINE),
+                    vectors_config=VectorParams(size=768, distance=Distance.COSINE, on_disk=True),
+                    quantization_config=QUANTIZATION_CONFIG,
                 )
                 logger.info(f"✅ Created collection: {self.collection_name}")
             else:
@@ -317,10 +531,12 @@ class VectorStore:
         if not items:
             return False
 
+        # embedding and QdrantClient calls are blocking HTTP; keep them off the event loop
+        texts = [f"{item.get('title', '')} {item.get('description', '')}" for item in items]
+        embeddings = await asyncio.to_thread(lambda: [self.generate_embedding(t) for t in texts])
+
         points: List[PointStruct] = []
-        for idx, item in enumerate(items):
-            text = f"{item.get('title', '')} {item.get('description', '')}"
-            embedding = self.generate_embedding(text)
+        for idx, (item, embedding) in enumerate(zip(items, embeddings)):
 
             if len(embedding) < 768:
                 embedding.extend([0.0] * (768 - len(embedding)))
@@ -339,22 +555,28 @@ class VectorStore:
                 },
             ))
 
-        self.qdrant_client.upsert(collection_name=self.collection_name, points=points)
+        await asyncio.to_thread(
+            self.qdrant_client.upsert, collection_name=self.collection_name, points=points
+        )
         logger.info(f"✅ Uploaded {len(points)} items")
         return True
 
     async def search_related_items(self, text: str, limit: int = 10) -> List[Dict]:
-        query_embedding = self.generate_embedding(text)
+        # embedding hits Gemini/Ollama over blocking HTTP; keep it off the event loop
+        query_embedding = await asyncio.to_thread(self.generate_embedding, text)
 
         if len(query_embedding) < 768:
             query_embedding.extend([0.0] * (768 - len(query_embedding)))
         elif len(query_embedding) > 768:
             query_embedding = query_embedding[:768]
 
-        results = self.qdrant_client.search(
+        results = await asyncio.to_thread(
+            self.qdrant_client.search,
             collection_name=self.collection_name,
             query_vector=query_embedding,
             limit=limit,
+            search_params=QUANTIZED_SEARCH_PARAMS,
+            score_threshold=SEARCH_SCORE_THRESHOLD,
         )
 
         return [
@@ -379,32 +601,35 @@ class VectorStore:
 # GIFT AI SERVICES
 # ========================================================================
 
+INTENT_PROMPT_PREFIX = """Extract gift intent from the vision analysis given at the end.
+
+Return ONLY valid JSON:
+{
+    "occasion": "birthday|wedding|diwali|general",
+    "recipient": "friend|family|anyone",
+    "budget_inr": 1000,
+    "sentiment": "warm|elegant|playful",
+    "interests": ["handmade", "decor"]
+}
+
+Vision analysis: """
+
+
 async def extract_intent(image_bytes: bytes, vision_analysis: Dict) -> Dict:
     """Extract gift intent from vision analysis using LLM"""
-    llm = LLMClient()
+    llm = get_llm_client()
 
     vision_text = (
         f"craft: {vision_analysis.get('craft_type')}, "
         f"occasion: {vision_analysis.get('occasion_hint')}"
     )
 
-    prompt = f"""Extract gift intent from vision analysis: {vision_text}
-
-Return ONLY valid JSON:
-{{
-    "occasion": "birthday|wedding|diwali|general",
-    "recipient": "friend|family|anyone",
-    "budget_inr": 1000,
-    "sentiment": "warm|elegant|playful",
-    "interests": ["handmade", "decor"]
-}}"""
+    # Static instructions first, vision hints last: keeps a cacheable prompt prefix
+    prompt = INTENT_PROMPT_PREFIX + vision_text
 
     try:
         result = await llm.generate_text(prompt)
-        clean = result.strip()
-        if "```json" in clean:
-            clean = clean.split("```json")[1].split("```")[0]
-        data = json.loads(clean.strip())
+        data = parse_model_json(result)
         data.setdefault("occasion", "birthday")
         data.setdefault("budget_inr", 1000)
         return data
@@ -433,106 +658,6 @@ def validate_items(
     return valid, invalid
 
 
-class GiftBundleService:
-    """
-    Generate gift bundles using Gemini LLM.
-    FIXED: model fallback chain + recipient-aware filtering in fallback.
-    """
-
-    def __init__(self):
-        self.google_api_key = os.getenv("GOOGLE_API_KEY")
-        self.genai = None
-
-        if self.google_api_key:
-            try:
-                genai.configure(api_key=self.google_api_key)
-                self.genai = genai
-            except Exception:
-                pass
-
-    def _call_gemini(self, prompt: str) -> Dict:
-        """
-        Try each model in GEMINI_MODEL_CHAIN using the genai library (v1beta endpoint).
-        AI Studio keys ONLY work on v1beta — not on the v1 REST endpoint.
-        Models: gemini-1.5-flash-8b → gemini-1.5-flash → gemini-1.5-pro
-        DO NOT use gemini-2.0-* (quota exhausted) or -latest suffix (404 on v1beta).
-        """
-        import re
-        last_error = None
-
-        if not self.genai:
-            raise Exception("Gemini not initialized — check GOOGLE_API_KEY")
-
-        for model_name in GEMINI_MODEL_CHAIN:
-            try:
-                model = self.genai.GenerativeModel(model_name)
-                response = model.generate_content(
-                    prompt,
-                    generation_config={"max_output_tokens": 2048, "temperature": 0.7},
-                )
-                text = response.text
-
-                if "```json" in text:
-                    text = text.split("```json")[1].split("```")[0]
-                elif "```" in text:
-                    text = text.split("```")[1].split("```")[0]
-                m = re.search(r"\{.*\}", text, re.DOTALL)
-                if m:
-                    text = m.group(0)
-
-                result = json.loads(text.strip())
-                logger.info(f"✅ Bundle generated via {model_name}")
-                return result
-
-            except Exception as e:
-                logger.warning(f"⚠️ Model '{model_name}' failed: {e}")
-                last_error = e
-                continue
-
-        raise Exception(f"All Gemini models failed. Last error: {last_error}")
-
-    async def generate_bundles(self, user_intent: str, items: List[Dict]) -> Dict:
-        """Generate gift bundles with recipient-aware filtering"""
-        logger.info(f"🎨 Generating bundles: '{user_intent}' with {len(items)} items")
-
-        # FIXED: filter by recipient before LLM call AND in fallback
-        filtered_items = _filter_items_by_recipient(items, user_intent)
-
-        from services.gift_prompt_templates import get_gift_bundle_prompt
-        prompt = get_gift_bundle_prompt(user_intent, filtered_items)
-
-        result = None
-        try:
-            if self.google_api_key and self.genai:
-                result = self._call_gemini(prompt)
-        except Exception as e:
-            logger.warning(f"⚠️ Gemini failed, using smart fallback: {e}")
-
-        if not result:
-            # FIXED: fallback uses filtered_items (not raw items)
-            result = {
-                "bundles": [{
-                    "bundle_name": "Curated Selection",
-                    "description": f"Items matching: {user_intent}",
-                    "items": [
-                        {"title": item["title"], "reason": "Relevant to your needs"}
-                        for item in filtered_items[:3]
-                    ],
-                }]
-            }
-
-        if "bundles" not in result:
-            result = {"bundles": []}
-
-        for bundle in result["bundles"]:
-            if "total_price" not in bundle:
-                bundle["total_price"] = sum(
-                    item.get("price", 0) for item in bundle.get("items", [])
-                )
-
-        return {"query": user_intent, "bundles": result["bundles"]}
-
-
 # ========================================================================
 # ORCHESTRATOR
 # ========================================================================
@@ -543,21 +668,29 @@ class GiftOrchestrator:
         self.vector_store = VectorStore()
         self.bundle_service = GiftBundleService()
         self._initialized = False
+        self._init_lock = asyncio.Lock()
 
     async def ensure_initialized(self):
-        if not self._initialized:
-            logger.info("🔧 First request — initializing connections…")
-            await self.vector_store.connect()
-            self._initialized = True
-            logger.info("✅ Orchestrator fully initialized")
+        if self._initialized:
+            return
+        # Concurrent first requests share one connect() instead of each opening clients
+        async with self._init_lock:
+            if not self._initialized:
+                logger.info("🔧 First request — initializing connections…")
+                await self.vector_store.connect()
+                self._initialized = True
+                logger.info("✅ Orchestrator fully initialized")
 
     async def refresh_vector_store(self) -> Dict:
         await self.ensure_initialized()
         try:
-            items = await self.vector_store.get_mongo_items(limit=100)
+            # Mongo fetch and Qdrant collection setup are independent; run them together
+            items, _ = await asyncio.gather(
+                self.vector_store.get_mongo_items(limit=100),
+                self.vector_store.setup_collection(),
+            )
             if not items:
                 return {"success": False, "error": "No published items found in MongoDB"}
-            await self.vector_store.setup_collection()
             await self.vector_store.upload_items(items)
             return {"success": True, "items_count": len(items)}
         except Exception as e:
@@ -698,44 +831,17 @@ class GiftOrchestrator:
                     "error": "Vision client not initialized",
                 }
 
-            prompt = """Analyze this handmade craft/artwork image comprehensively.
-
-Return ONLY a valid JSON object (no markdown, no extra text):
-{
-    "craft_type": "pottery|textile|metalwork|painting|sculpture|woodwork|jewelry|decorative|other",
-    "quality": "high|medium|low",
-    "price_range_inr": "500-1500",
-    "estimated_price": 1000,
-    "fraud_score": 0.1,
-    "is_suspicious": false,
-    "packaging": "eco-friendly box",
-    "material": "clay",
-    "sentiment": "warm|playful|elegant|traditional|modern|rustic",
-    "emotion": "joyful|peaceful|energetic|nostalgic|sophisticated",
-    "occasion": "birthday|wedding|diwali|holi|anniversary|housewarming|graduation|general"
-}"""
-
             logger.info("🎨 Calling Gemini Vision (timeout: 90 s)…")
             try:
                 response = await asyncio.wait_for(
-                    vision_client.analyze_image(image_bytes, prompt),
+                    vision_client.analyze_image(image_bytes, FULL_VISION_PROMPT),
                     timeout=90.0,
                 )
             except asyncio.TimeoutError:
                 logger.error("❌ Vision analysis timed out after 90 s")
                 return {**fallback_vision, "status": "timeout", "error": "Vision timeout"}
 
-            clean_text = response.strip()
-            if "```json" in clean_text:
-                clean_text = clean_text.split("```json")[1].split("```")[0]
-            elif "```" in clean_text:
-                clean_text = clean_text.split("```")[1].split("```")[0]
-
-            json_match = re.search(r"\{.*\}", clean_text, re.DOTALL)
-            if json_match:
-                clean_text = json_match.group(0)
-
-            data = json.loads(clean_text.strip())
+            data = parse_model_json(response)
             logger.info(f"✅ Vision: {data.get('craft_type')} | {data.get('quality')} | ₹{data.get('estimated_price')}")
 
             return {
@@ -753,7 +859,7 @@ Return ONLY a valid JSON object (no markdown, no extra text):
                 "occasion_hint":  data.get("occasion"),
             }
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error(f"❌ JSON parse error: {e}")
             return {**fallback_vision, "status": "parse_error", "error": str(e)}
         except Exception as e:
@@ -767,19 +873,102 @@ Return ONLY a valid JSON object (no markdown, no extra text):
 # ========================================================================
 
 def extract_json_from_response(text: str) -> Dict:
-    if "```json" in text:
-        text = text.split("```json")[1].split("```")[0]
-    elif "```" in text:
-        text = re.sub(r"```.*?```", "", text, flags=re.DOTALL)
-    json_match = re.search(r"\{.*\}", text, re.DOTALL)
-    if json_match:
-        text = json_match.group(0)
     try:
-        return json.loads(text.strip())
-    except Exception:
+        return parse_model_json(text)
+    except orjson.JSONDecodeError:
         return {"raw_response": text}
 
 
+# Perceptual hashes of images the vision model flagged as fraudulent (hash -> time
+# flagged, oldest first). Near-duplicates (Hamming distance <= FRAUD_HASH_MAX_DISTANCE)
+# skip the model call. Entries expire after FRAUD_HASH_TTL seconds and the oldest is
+# evicted past FRAUD_HASH_MAX_ENTRIES.
+FRAUD_HASH_MAX_DISTANCE = 6
+FRAUD_HASH_MAX_ENTRIES = int(os.getenv("FRAUD_HASH_MAX_ENTRIES", "10000"))
+FRAUD_HASH_TTL = float(os.getenv("FRAUD_HASH_TTL", str(24 * 3600)))
+# Flat, blank or plain-background images hash to (nearly) all-0 or all-1 bits and
+# would all match each other; hashes with fewer than this many 0s or 1s are ignored
+FRAUD_HASH_MIN_BITS = 8
+_flagged_image_hashes: "OrderedDict[int, float]" = OrderedDict()
+
+
+def image_dhash(image_bytes: bytes) -> Optional[int]:
+    """64-bit difference hash (dHash) of an image, or None if it can't be decoded."""
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        img.draft("L", (64, 64))  # JPEG: decode at reduced scale
+        px = img.convert("L").resize((9, 8), Image.Resampling.LANCZOS).tobytes()
+    except Exception:
+        return None
+    bits = 0
+    for row in range(0, 72, 9):
+        for col in range(row, row + 8):
+            bits = (bits << 1) | (px[col] < px[col + 1])
+    return bits
+
+
+def is_distinctive_hash(image_hash: Optional[int]) -> bool:
+    if image_hash is None:
+        return False
+    ones = image_hash.bit_count()
+    return FRAUD_HASH_MIN_BITS <= ones <= 64 - FRAUD_HASH_MIN_BITS
+
+
+def _expire_flagged_hashes() -> None:
+    cutoff = time.monotonic() - FRAUD_HASH_TTL
+    while _flagged_image_hashes:
+        oldest, flagged_at = next(iter(_flagged_image_hashes.items()))
+        if flagged_at > cutoff:
+            break
+        del _flagged_image_hashes[oldest]
+
+
+def is_known_fraud_image(image_hash: Optional[int]) -> bool:
+    if not is_distinctive_hash(image_hash):
+        return False
+    _expire_flagged_hashes()
+    return any(
+        (image_hash ^ flagged).bit_count() <= FRAUD_HASH_MAX_DISTANCE
+        for flagged in _flagged_image_hashes
+    )
+
+
+def flag_fraud_image(image_hash: Optional[int]) -> None:
+    if not is_distinctive_hash(image_hash):
+        return
+    _flagged_image_hashes.pop(image_hash, None)
+    _flagged_image_hashes[image_hash] = time.monotonic()
+    while len(_flagged_image_hashes) > FRAUD_HASH_MAX_ENTRIES:
+        _flagged_image_hashes.popitem(last=False)
+
+
+# Uploads above this are rejected with 413 while they are still being read
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+
+async def read_capped(upload: UploadFile, limit: int = MAX_UPLOAD_BYTES) -> bytes:
+    """Read an upload in chunks, failing fast once it exceeds *limit* bytes."""
+    buf = bytearray()
+    while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+        buf += chunk
+        if len(buf) > limit:
+            raise HTTPException(413, f"Image exceeds {limit // (1024 * 1024)} MB limit")
+    return bytes(buf)
+
+
+async def read_capped_body(request: Request, limit: int = MAX_UPLOAD_BYTES) -> bytes:
+    """read_capped for raw (non-multipart) request bodies."""
+    buf = bytearray()
+    async for chunk in request.stream():
+        buf += chunk
+        if len(buf) > limit:
+            raise HTTPException(413, f"Image exceeds {limit // (1024 * 1024)} MB limit")
+    if not buf:
+        raise HTTPException(400, "No image data provided")
+    return bytes(buf)
+
+
 async def call_vision_direct(image_bytes: bytes, prompt: str) -> Dict:
     if not vision_client or not vision_client.gemini_model:
         raise HTTPException(503, "Vision AI not configured")
@@ -811,6 +1000,73 @@ class TextSearchResponse(BaseModel):
     error: Optional[str] = None
 
 
+# Vision endpoint results. Fields mirror the schemas in VISION_ANALYSES; extra
+# keys the model adds are passed through.
+class VisionResult(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+
+class CraftResult(VisionResult):
+    craft_type: str = "unknown"
+    confidence: Optional[float] = None
+    details: Optional[str] = None
+
+
+class QualityResult(VisionResult):
+    quality: str = "medium"
+    craftsmanship_score: Optional[float] = None
+    details: Optional[str] = None
+
+
+class PriceResult(VisionResult):
+    price_range_inr: Optional[str] = None
+    estimated_price: float = 1000
+    factors: List[str] = []
+
+
+class FraudResult(VisionResult):
+    fraud_score: float = 0.0
+    is_suspicious: Optional[bool] = None
+    red_flags: List[str] = []
+
+
+class PackagingResult(VisionResult):
+    packaging: str = "eco-friendly box"
+    cost: Optional[float] = None
+    materials: List[str] = []
+
+
+class MaterialResult(VisionResult):
+    material: str = "mixed"
+    purity: Optional[float] = None
+    additional_materials: List[str] = []
+
+
+class SentimentResult(VisionResult):
+    sentiment: str = "warm"
+    emotion: Optional[str] = None
+    appeal_score: Optional[float] = None
+
+
+class OccasionResult(VisionResult):
+    occasion: str = "general"
+    confidence: Optional[float] = None
+    suitable_occasions: List[str] = []
+
+
+# VISION_ANALYSES key -> response model for that analysis
+VISION_RESULT_MODELS: Dict[str, type] = {
+    "craft":     CraftResult,
+    "quality":   QualityResult,
+    "price":     PriceResult,
+    "fraud":     FraudResult,
+    "packaging": PackagingResult,
+    "material":  MaterialResult,
+    "sentiment": SentimentResult,
+    "occasion":  OccasionResult,
+}
+
+
 # ========================================================================
 # GLOBAL SINGLETONS (Lazy Init)
 # ========================================================================
@@ -833,10 +1089,15 @@ async def get_orchestrator() -> GiftOrchestrator:
 async def lifespan(app: FastAPI):
     global vision_client
 
+    start_queue_logging()
+    start_preprocess_pool()
     logger.info("🚀 Starting Unified Gift AI Service (Fast Startup Mode)…")
 
     try:
         vision_client = VisionAIClient()
+        gemini_client.open_http_client()
+        if ENABLE_OLLAMA:
+            open_ollama_client()
         logger.info("✅ Service ready (DB connections made on first request)")
         logger.info("⚡ Startup time: <5 s")
     except Exception as e:
@@ -848,6 +1109,10 @@ async def lifespan(app: FastAPI):
     if orchestrator and orchestrator._initialized:
         await orchestrator.vector_store.close()
         logger.info("🔌 Connections closed")
+    await gemini_client.close_http_client()
+    await close_ollama_client()
+    stop_preprocess_pool()
+    stop_queue_logging()
 
 
 # ========================================================================
@@ -858,6 +1123,7 @@ app = FastAPI(
     title="Unified Gift AI Service",
     version="4.3.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -867,17 +1133,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON bodies (bundles / vision results) above 512 bytes
+app.add_middleware(GZipMiddleware, minimum_size=512)
+
 
 # ── Core ──────────────────────────────────────────────────────────────────────
 
+# Constant payload: serialised once at import, not per request
+_ROOT_BODY = orjson.dumps({
+    "service": "unified-gift-ai",
+    "version": "4.3.0",
+    "status": "running",
+    "features": ["lazy-init", "fast-startup", "recipient-aware-filtering"],
+})
+
+
 @app.get("/")
 async def root():
-    return {
-        "service": "unified-gift-ai",
-        "version": "4.3.0",
-        "status": "running",
-        "features": ["lazy-init", "fast-startup", "recipient-aware-filtering"],
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 @app.get("/health")
@@ -902,9 +1175,7 @@ async def generate_gift_bundle(image: UploadFile = File(...)):
     """Image → Gift Bundles"""
     orch = await get_orchestrator()
     try:
-        image_bytes = await image.read()
-        if len(image_bytes) > 5 * 1024 * 1024:
-            raise HTTPException(400, "Image too large (max 5 MB)")
+        image_bytes = await read_capped(image, limit=5 * 1024 * 1024)
         result = await orch.generate_bundle(image_bytes, image.filename)
         return result
     except HTTPException:
@@ -948,7 +1219,7 @@ async def vector_store_info():
     orch = await get_orchestrator()
     try:
         await orch.ensure_initialized()
-        collections_response = orch.vector_store.qdrant_client.get_collections()
+        collections_response = await asyncio.to_thread(orch.vector_store.qdrant_client.get_collections)
         # ✅ FIX: plain list — no bool() on response object
         existing_names = [col.name for col in collections_response.collections]
         collection_name = orch.vector_store.collection_name
@@ -960,7 +1231,7 @@ async def vector_store_info():
                 "message": f"Collection '{collection_name}' does not exist. Run /refresh_vector_store first.",
             }
 
-        info = orch.vector_store.qdrant_client.get_collection(collection_name)
+        info = await asyncio.to_thread(orch.vector_store.qdrant_client.get_collection, collection_name)
         return {
             "success":       True,
             "collection":    collection_name,
@@ -973,140 +1244,356 @@ async def vector_store_info():
 
 # ── Vision AI endpoints ───────────────────────────────────────────────────────
 
-async def _analyze_craft_impl(image: UploadFile):
-    image_bytes = await image.read()
-    prompt = """Analyze craft type. Return ONLY JSON:
-{"craft_type": "pottery|textile|metalwork|painting|other", "confidence": 0.9, "details": "brief description"}"""
-    result = await call_vision_direct(image_bytes, prompt)
-    result.setdefault("craft_type", "unknown")
-    return result
+# name -> (task, defaults). The task text goes after VISION_PROMPT_PREFIX;
+# all eight are asked for in one combined prompt. Defaults fill missing keys.
+VISION_ANALYSES: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    "craft": ("""Analyze craft type. JSON schema:
+{"craft_type": "pottery|textile|metalwork|painting|other", "confidence": 0.9, "details": "brief description"}""",
+              {"craft_type": "unknown"}),
+    "quality": ("""Analyze quality. JSON schema:
+{"quality": "high|medium|low", "craftsmanship_score": 0.8, "details": "description"}""",
+                {"quality": "medium"}),
+    "price": ("""Estimate price in INR. JSON schema:
+{"price_range_inr": "500-1500", "estimated_price": 1000, "factors": ["material", "craftsmanship"]}""",
+              {"estimated_price": 1000}),
+    "fraud": ("""Detect fraud indicators. JSON schema:
+{"fraud_score": 0.1, "is_suspicious": false, "red_flags": []}""",
+              {"fraud_score": 0.0}),
+    "packaging": ("""Recommend packaging. JSON schema:
+{"packaging": "eco-friendly box with padding", "cost": 100, "materials": ["cardboard", "bubble wrap"]}""",
+                  {"packaging": "eco-friendly box"}),
+    "material": ("""Identify materials. JSON schema:
+{"material": "primary material", "purity": 0.8, "additional_materials": []}""",
+                 {"material": "mixed"}),
+    "sentiment": ("""Analyze sentiment. JSON schema:
+{"sentiment": "warm|elegant|playful", "emotion": "joyful|peaceful", "appeal_score": 0.8}""",
+                  {"sentiment": "warm"}),
+    "occasion": ("""Detect suitable occasions. JSON schema:
+{"occasion": "birthday|wedding|general", "confidence": 0.7, "suitable_occasions": ["birthday", "anniversary"]}""",
+                 {"occasion": "general"}),
+}
 
-@app.post("/analyze_craft")
-async def analyze_craft_underscore(image: UploadFile = File(...)):
-    return await _analyze_craft_impl(image)
 
-@app.post("/analyze-craft")
-async def analyze_craft_hyphen(image: UploadFile = File(...)):
-    return await _analyze_craft_impl(image)
+COMBINED_VISION_PROMPT = VISION_PROMPT_PREFIX + (
+    "Analyze every aspect listed below. Return one JSON object whose top-level keys are "
+    + ", ".join(f'"{name}"' for name in VISION_ANALYSES)
+    + "; each key holds the object described by that aspect's schema.\n"
+    + "\n".join(f"[{name}] {task}" for name, (task, _) in VISION_ANALYSES.items())
+)
 
+# image_key -> in-flight combined call, so concurrent requests for the same
+# image share one model call
+_combined_inflight: Dict[bytes, "asyncio.Future[Dict[str, Dict]]"] = {}
+
+# image_key -> parsed combined result; repeat uploads skip the call and the parse
+VISION_RESULT_CACHE_SIZE = int(os.getenv("VISION_RESULT_CACHE_SIZE", "1024"))
+_vision_results: "OrderedDict[bytes, Dict[str, Dict]]" = OrderedDict()
+# misses: requests that started the upstream call; joins: requests that waited on
+# one already in flight
+_vision_cache_stats = {"hits": 0, "misses": 0, "joins": 0, "disk_hits": 0}
+
+# The analyses are read-only image -> JSON lookups (no side effects; the fraud
+# flag-set update happens outside), so results don't go stale for the same bytes
+# and prompt/models/schema, and can persist across restarts. Opt-in because the
+# directory is unbounded.
+VISION_DISK_CACHE = os.getenv("VISION_DISK_CACHE", "false").lower() == "true"
+VISION_DISK_CACHE_DIR = Path(os.getenv(
+    "VISION_DISK_CACHE_DIR", VisionAIClient.MODEL_CACHE_DIR / "vision_results"
+))
+
+# Changes whenever the prompt, the model chain or a response schema changes, so
+# disk entries written for an older version are never served
+VISION_CACHE_VERSION = hashlib.blake2b(
+    orjson.dumps({
+        "prompt": COMBINED_VISION_PROMPT,
+        "models": GEMINI_MODEL_CHAIN,
+        "schemas": {name: model.model_json_schema() for name, model in VISION_RESULT_MODELS.items()},
+    }, option=orjson.OPT_SORT_KEYS),
+    digest_size=8,
+).hexdigest()
+
+# /cache/invalidate bumps this counter on disk. Every worker re-reads it at most
+# once per VISION_GENERATION_CHECK_SECS and drops its in-memory caches when it
+# changes, so one call invalidates all uvicorn workers.
+VISION_CACHE_GENERATION_FILE = VISION_DISK_CACHE_DIR / "generation"
+VISION_GENERATION_CHECK_SECS = 1.0
+_vision_generation = 0
+_generation_checked_at = float("-inf")
+
+
+def _read_generation() -> int:
+    try:
+        return int(VISION_CACHE_GENERATION_FILE.read_text())
+    except (OSError, ValueError):
+        return 0
 
-async def _analyze_quality_impl(image: UploadFile):
-    image_bytes = await image.read()
-    prompt = """Analyze quality. Return ONLY JSON:
-{"quality": "high|medium|low", "craftsmanship_score": 0.8, "details": "description"}"""
-    result = await call_vision_direct(image_bytes, prompt)
-    result.setdefault("quality", "medium")
-    return result
 
-@app.post("/analyze_quality")
-async def analyze_quality_underscore(image: UploadFile = File(...)):
-    return await _analyze_quality_impl(image)
+def _bump_generation() -> int:
+    VISION_DISK_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    generation = _read_generation() + 1
+    tmp = VISION_CACHE_GENERATION_FILE.with_name(f"generation.{os.getpid()}.tmp")
+    tmp.write_text(str(generation))
+    os.replace(tmp, VISION_CACHE_GENERATION_FILE)
+    return generation
 
-@app.post("/analyze-quality")
-async def analyze_quality_hyphen(image: UploadFile = File(...)):
-    return await _analyze_quality_impl(image)
 
+def _set_generation(generation: int) -> None:
+    global _vision_generation
+    if generation != _vision_generation:
+        _vision_results.clear()
+        _flagged_image_hashes.clear()
+        _vision_generation = generation
 
-async def _estimate_price_impl(image: UploadFile):
-    image_bytes = await image.read()
-    prompt = """Estimate price in INR. Return ONLY JSON:
-{"price_range_inr": "500-1500", "estimated_price": 1000, "factors": ["material", "craftsmanship"]}"""
-    result = await call_vision_direct(image_bytes, prompt)
-    result.setdefault("estimated_price", 1000)
-    return result
 
-@app.post("/estimate_price")
-async def estimate_price_underscore(image: UploadFile = File(...)):
-    return await _estimate_price_impl(image)
+async def _sync_generation() -> None:
+    global _generation_checked_at
+    now = time.monotonic()
+    if now - _generation_checked_at < VISION_GENERATION_CHECK_SECS:
+        return
+    _generation_checked_at = now
+    _set_generation(await asyncio.to_thread(_read_generation))
 
-@app.post("/estimate-price")
-async def estimate_price_hyphen(image: UploadFile = File(...)):
-    return await _estimate_price_impl(image)
 
+def _disk_cache_path(key: bytes, generation: int) -> Path:
+    return VISION_DISK_CACHE_DIR / f"{VISION_CACHE_VERSION}-{generation}" / f"{key.hex()}.json"
 
-async def _detect_fraud_impl(image: UploadFile):
-    image_bytes = await image.read()
-    prompt = """Detect fraud indicators. Return ONLY JSON:
-{"fraud_score": 0.1, "is_suspicious": false, "red_flags": []}"""
-    result = await call_vision_direct(image_bytes, prompt)
-    result.setdefault("fraud_score", 0.0)
-    return result
 
-@app.post("/detect_fraud")
-async def detect_fraud_underscore(image: UploadFile = File(...)):
-    return await _detect_fraud_impl(image)
+def _purge_disk_results() -> int:
+    """Delete every cached result file (all versions and generations)."""
+    removed = 0
+    if VISION_DISK_CACHE_DIR.is_dir():
+        for path in VISION_DISK_CACHE_DIR.glob("**/*.json"):
+            path.unlink(missing_ok=True)
+            removed += 1
+        for subdir in VISION_DISK_CACHE_DIR.iterdir():
+            if subdir.is_dir():
+                shutil.rmtree(subdir, ignore_errors=True)
+    return removed
 
-@app.post("/detect-fraud")
-async def detect_fraud_hyphen(image: UploadFile = File(...)):
-    return await _detect_fraud_impl(image)
 
+def _read_disk_result(key: bytes, generation: int) -> Optional[Dict[str, Dict]]:
+    try:
+        return orjson.loads(_disk_cache_path(key, generation).read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return None
 
-async def _suggest_packaging_impl(image: UploadFile):
-    image_bytes = await image.read()
-    prompt = """Recommend packaging. Return ONLY JSON:
-{"packaging": "eco-friendly box with padding", "cost": 100, "materials": ["cardboard", "bubble wrap"]}"""
-    result = await call_vision_direct(image_bytes, prompt)
-    result.setdefault("packaging", "eco-friendly box")
-    return result
 
-@app.post("/suggest_packaging")
-async def suggest_packaging_underscore(image: UploadFile = File(...)):
-    return await _suggest_packaging_impl(image)
+def _write_disk_result(key: bytes, generation: int, results: Dict[str, Dict]) -> None:
+    try:
+        path = _disk_cache_path(key, generation)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(orjson.dumps(results))
+    except OSError as e:
+        logger.debug(f"Could not persist vision result: {e}")
 
-@app.post("/suggest-packaging")
-async def suggest_packaging_hyphen(image: UploadFile = File(...)):
-    return await _suggest_packaging_impl(image)
 
+def _clean_section(name: str, section: Any) -> Dict:
+    """
+    Merge one section of the model's reply over its defaults. Nulls are dropped,
+    and values the response model rejects ("confidence": "high", "estimated_price":
+    "₹1200", ...) fall back to the default, so an odd reply can't fail the endpoint.
+    """
+    defaults = VISION_ANALYSES[name][1]
+    if not isinstance(section, dict):
+        return dict(defaults)
+    merged = defaults | {k: v for k, v in section.items() if v is not None}
+    try:
+        VISION_RESULT_MODELS[name].model_validate(merged)
+    except ValidationError as e:
+        bad = {err["loc"][0] for err in e.errors() if err["loc"]}
+        logger.warning(f"⚠️ Vision '{name}' section: dropping invalid fields {sorted(bad)}")
+        merged = defaults | {k: v for k, v in merged.items() if k not in bad}
+    return merged
+
+
+async def _call_combined(key: bytes, image_bytes: bytes) -> Dict[str, Dict]:
+    generation = _vision_generation
+    results = (
+        await asyncio.to_thread(_read_disk_result, key, generation) if VISION_DISK_CACHE else None
+    )
+    if results is not None:
+        _vision_cache_stats["disk_hits"] += 1
+        # entries written before sections were cleaned may still hold nulls
+        results = {name: _clean_section(name, results.get(name)) for name in VISION_ANALYSES}
+    else:
+        combined = await call_vision_direct(image_bytes, COMBINED_VISION_PROMPT)
+        if not isinstance(combined, dict):
+            combined = {}
+        results = {name: _clean_section(name, combined.get(name)) for name in VISION_ANALYSES}
+        if not any(isinstance(combined.get(name), dict) for name in VISION_ANALYSES):
+            # Nothing parsed: answer with the defaults plus the model's raw text, and
+            # cache nothing so the next request for this image asks the model again
+            logger.warning("⚠️ Combined vision reply had no usable sections; not caching")
+            if "raw_response" in combined:
+                for section in results.values():
+                    section["raw_response"] = combined["raw_response"]
+            return results
+        if VISION_DISK_CACHE:
+            await asyncio.to_thread(_write_disk_result, key, generation, results)
+    if generation != _vision_generation:
+        return results  # invalidated while the call was in flight
+    _vision_results[key] = results
+    if len(_vision_results) > VISION_RESULT_CACHE_SIZE:
+        _vision_results.popitem(last=False)
+    return results
+
+
+async def analyze_combined(image_bytes: bytes) -> Dict[str, Dict]:
+    """All eight analyses from a single vision call, cached and coalesced per image."""
+    await _sync_generation()
+    key = image_key(image_bytes)
+    cached = _vision_results.get(key)
+    if cached is not None:
+        _vision_results.move_to_end(key)
+        _vision_cache_stats["hits"] += 1
+        return cached
+
+    future = _combined_inflight.get(key)
+    if future is not None:
+        _vision_cache_stats["joins"] += 1
+    else:
+        _vision_cache_stats["misses"] += 1
+        future = asyncio.ensure_future(_call_combined(key, image_bytes))
+        _combined_inflight[key] = future
+        future.add_done_callback(lambda _: _combined_inflight.pop(key, None))
+    # shield: one caller disconnecting must not cancel the call for the others
+    return await asyncio.shield(future)
+
+
+async def _run_analysis(name: str, image_bytes: bytes) -> Dict:
+    return dict((await analyze_combined(image_bytes))[name])
+
+
+async def _detect_fraud_bytes(image_bytes: bytes) -> Dict:
+    image_hash = await run_preprocess(image_dhash, image_bytes)
+    if is_known_fraud_image(image_hash):
+        logger.info("🚩 Fraud preflight: near-duplicate of a flagged image, skipping vision call")
+        return {
+            "fraud_score": 0.95,
+            "is_suspicious": True,
+            "red_flags": ["near-duplicate of a previously flagged image"],
+        }
 
-async def _detect_material_impl(image: UploadFile):
-    image_bytes = await image.read()
-    prompt = """Identify materials. Return ONLY JSON:
-{"material": "primary material", "purity": 0.8, "additional_materials": []}"""
-    result = await call_vision_direct(image_bytes, prompt)
-    result.setdefault("material", "mixed")
+    result = await _run_analysis("fraud", image_bytes)
+
+    if result.get("is_suspicious") is True:
+        flag_fraud_image(image_hash)
     return result
 
-@app.post("/detect_material")
-async def detect_material_underscore(image: UploadFile = File(...)):
-    return await _detect_material_impl(image)
 
-@app.post("/detect-material")
-async def detect_material_hyphen(image: UploadFile = File(...)):
-    return await _detect_material_impl(image)
+async def _analyze_bytes(name: str, image_bytes: bytes) -> Dict:
+    if name == "fraud":
+        return await _detect_fraud_bytes(image_bytes)
+    return await _run_analysis(name, image_bytes)
 
 
-async def _analyze_sentiment_impl(image: UploadFile):
-    image_bytes = await image.read()
-    prompt = """Analyze sentiment. Return ONLY JSON:
-{"sentiment": "warm|elegant|playful", "emotion": "joyful|peaceful", "appeal_score": 0.8}"""
-    result = await call_vision_direct(image_bytes, prompt)
-    result.setdefault("sentiment", "warm")
-    return result
+async def _analyze_all_impl(image: UploadFile):
+    """Read the upload once; all analyses resolve from one combined vision call."""
+    if not vision_client or not vision_client.gemini_model:
+        raise HTTPException(503, "Vision AI not configured")
+    image_bytes = await read_capped(image)
+    names = list(VISION_ANALYSES)
+    responses = await asyncio.gather(
+        *(_analyze_bytes(name, image_bytes) for name in names),
+        return_exceptions=True,
+    )
+    results: Dict[str, Any] = {}
+    for name, response in zip(names, responses):
+        if isinstance(response, HTTPException):
+            results[name] = {"error": response.detail}
+        elif isinstance(response, Exception):
+            results[name] = {"error": str(response)}
+        else:
+            results[name] = response
+    return results
 
-@app.post("/analyze_sentiment")
-async def analyze_sentiment_underscore(image: UploadFile = File(...)):
-    return await _analyze_sentiment_impl(image)
+@app.post("/analyze_all")
+async def analyze_all_underscore(image: UploadFile = File(...)):
+    return await _analyze_all_impl(image)
 
-@app.post("/analyze-sentiment")
-async def analyze_sentiment_hyphen(image: UploadFile = File(...)):
-    return await _analyze_sentiment_impl(image)
+@app.post("/analyze-all")
+async def analyze_all_hyphen(image: UploadFile = File(...)):
+    return await _analyze_all_impl(image)
 
 
-async def _detect_occasion_impl(image: UploadFile):
-    image_bytes = await image.read()
-    prompt = """Detect suitable occasions. Return ONLY JSON:
-{"occasion": "birthday|wedding|general", "confidence": 0.7, "suitable_occasions": ["birthday", "anniversary"]}"""
-    result = await call_vision_direct(image_bytes, prompt)
-    result.setdefault("occasion", "general")
-    return result
+@app.get("/cache_stats")
+async def cache_stats():
+    lookups = sum(_vision_cache_stats[k] for k in ("hits", "misses", "joins"))
+    return {
+        "vision_results": {
+            "size":     len(_vision_results),
+            "capacity": VISION_RESULT_CACHE_SIZE,
+            **_vision_cache_stats,
+            "hit_rate": round(_vision_cache_stats["hits"] / lookups, 4) if lookups else 0.0,
+        },
+        "disk_cache": {
+            "enabled": VISION_DISK_CACHE,
+            "path":    str(VISION_DISK_CACHE_DIR),
+            "version": VISION_CACHE_VERSION,
+        },
+        "generation": _vision_generation,
+    }
+
+
+@app.post("/cache/invalidate")
+async def invalidate_cache():
+    """
+    Drop every cached vision result (memory and disk) and the flagged-image hashes.
+    Bumps the on-disk generation, so the other workers drop their in-memory caches
+    within VISION_GENERATION_CHECK_SECS.
+    """
+    cleared = len(_vision_results)
+    try:
+        generation = await asyncio.to_thread(_bump_generation)
+    except OSError as e:
+        logger.warning(f"⚠️ Could not bump cache generation, only this worker is cleared: {e}")
+        generation = _vision_generation + 1
+    _set_generation(generation)
+    removed = await asyncio.to_thread(_purge_disk_results)
+    return {
+        "success": True, "memory_entries": cleared, "disk_entries": removed,
+        "generation": generation,
+    }
+
+
+# route -> VISION_ANALYSES key; each is served at /<route> and
+# /<route-with-hyphens> (multipart; the alias is hidden from the OpenAPI schema),
+# plus /<route>_raw, which takes the image as the raw request body
+# (application/octet-stream) for non-browser clients.
+# Responses use the analysis' model from VISION_RESULT_MODELS.
+VISION_ROUTES = {
+    "analyze_craft":     "craft",
+    "analyze_quality":   "quality",
+    "estimate_price":    "price",
+    "detect_fraud":      "fraud",
+    "suggest_packaging": "packaging",
+    "detect_material":   "material",
+    "analyze_sentiment": "sentiment",
+    "detect_occasion":   "occasion",
+}
+
+
+def _make_vision_handler(route: str, name: str):
+    async def handler(image: UploadFile = File(...)):
+        return await _analyze_bytes(name, await read_capped(image))
+    handler.__name__ = route
+    return handler
+
+
+def _make_raw_vision_handler(route: str, name: str):
+    async def handler(request: Request):
+        return await _analyze_bytes(name, await read_capped_body(request))
+    handler.__name__ = f"{route}_raw"
+    return handler
 
-@app.post("/detect_occasion")
-async def detect_occasion_underscore(image: UploadFile = File(...)):
-    return await _detect_occasion_impl(image)
 
-@app.post("/detect-occasion")
-async def detect_occasion_hyphen(image: UploadFile = File(...)):
-    return await _detect_occasion_impl(image)
+for _route, _name in VISION_ROUTES.items():
+    _model = VISION_RESULT_MODELS[_name]
+    _handler = _make_vision_handler(_route, _name)
+    app.post(f"/{_route}", response_model=_model)(_handler)
+    # Hyphenated alias shares the handler; keep it out of the schema so operation ids stay unique
+    app.post(f"/{_route.replace('_', '-')}", response_model=_model, include_in_schema=False)(_handler)
+    app.post(f"/{_route}_raw", response_model=_model)(_make_raw_vision_handler(_route, _name))
 
 
 # ========================================================================
@@ -1115,4 +1602,16 @@ async def detect_occasion_hyphen(image: UploadFile = File(...)):
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8001))
-    uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True, log_level="info")
\ No newline at end of file
+    if os.getenv("DEV") == "1":
+        uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True, log_level="info")
+    else:
+        # uvloop + httptools ship with uvicorn[standard]; caches are per worker
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=port,
+            workers=int(os.getenv("WEB_CONCURRENCY", min(os.cpu_count() or 1, 4))),
+            loop="uvloop",
+            http="httptools",
+            log_level="info",
+        )
\ No newline at end of file
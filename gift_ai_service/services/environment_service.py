@@ -9,6 +9,7 @@ Provides a small EnvironmentService used by the Gift AI pipeline.
 from datetime import datetime
 import random
 import os
+import zlib
 from typing import Dict, Any, Optional
 
 try:
@@ -20,6 +21,14 @@ ENV_COLLECTION = os.getenv("ENV_COLLECTION", "environment_context")
 MONGO_URI = os.getenv("MONGO_URI")
 MONGO_DB = os.getenv("MONGO_DB", "gift_ai_service")
 
+# user-activity hints indexed by a 2-bit hash of the user_id
+_USER_ACTIVITY_HINTS = (
+    None,
+    "browsing_home_decor",
+    "purchased_clothing_recently",
+    "interested_in_kitchen",
+)
+
 
 class EnvironmentService:
     """
@@ -127,15 +136,5 @@ class EnvironmentService:
         """
         if not user_id:
             return random.choice([None, "browsing_home_decor", "looking_for_tech", None])
-        # deterministic-ish hint for a user_id: simple hash mod
-        try:
-            val = sum(ord(c) for c in str(user_id)) % 4
-        except Exception:
-            val = random.randint(0, 3)
-        mapping = {
-            0: None,
-            1: "browsing_home_decor",
-            2: "purchased_clothing_recently",
-            3: "interested_in_kitchen"
-        }
-        return mapping.get(val, None)
+        # deterministic hint for a user_id: crc32 low bits
+        return _USER_ACTIVITY_HINTS[zlib.crc32(str(user_id).encode()) & 3]
@@ -12,9 +12,19 @@ Key facts about AI Studio API keys:
 
 import os
 import re
-import json
+import copy
+import asyncio
+import time
+import orjson
 import logging
-from typing import List, Dict, Any
+from collections import OrderedDict
+from operator import itemgetter
+from typing import List, Dict, Any, Optional, Tuple
+
+import httpx
+
+from core.llm_client import parse_model_json
+from services.gift_prompt_templates import get_gift_bundle_prompt
 
 logger = logging.getLogger(__name__)
 
@@ -25,19 +35,72 @@ GEMINI_MODEL_CHAIN = [
     "gemini-2.5-flash",
 ]
 
+# Read once at import; every GiftBundleService instance shares them
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
+LLM_MODEL      = os.getenv("LLM_MODEL", GEMINI_MODEL_CHAIN[0])
+
+# Optional local fallback when every Gemini model fails
+ENABLE_OLLAMA = os.getenv("ENABLE_OLLAMA", "false").lower() == "true"
+OLLAMA_URL    = os.getenv("OLLAMA_URL", "http://localhost:11434")
+OLLAMA_MODEL  = os.getenv("OLLAMA_MODEL", "llama3")
+
+# Max in-flight LLM requests per service instance (keeps request bursts under provider QPM)
+LLM_CONCURRENCY_LIMIT = int(os.getenv("LLM_CONCURRENCY_LIMIT", "20"))
+
+# Per-attempt Gemini deadline; slow stragglers are abandoned and retried with backoff
+LLM_TIMEOUT     = float(os.getenv("LLM_TIMEOUT", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+
+# LRU of LLM-generated bundles keyed on (normalised intent, candidate item ids).
+# Entries expire after BUNDLE_CACHE_TTL seconds so catalogue edits (prices,
+# descriptions) eventually show up in cached bundles.
+BUNDLE_CACHE_SIZE = int(os.getenv("BUNDLE_CACHE_SIZE", "1024"))
+BUNDLE_CACHE_TTL  = float(os.getenv("BUNDLE_CACHE_TTL", "3600"))
+
+# Shared async client so repeated fallback calls reuse the local TCP connection.
+# Opened/closed by the app lifespan via open_ollama_client / close_ollama_client.
+_ollama_client: Optional[httpx.AsyncClient] = None
+
+
+def open_ollama_client() -> httpx.AsyncClient:
+    """Return the shared Ollama client, creating it if needed."""
+    global _ollama_client
+    if _ollama_client is None:
+        _ollama_client = httpx.AsyncClient(
+            timeout=60.0,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=8),
+        )
+    return _ollama_client
+
+
+async def close_ollama_client() -> None:
+    """Close the shared Ollama client (app lifespan shutdown)."""
+    global _ollama_client
+    if _ollama_client is not None:
+        await _ollama_client.aclose()
+        _ollama_client = None
+
 # ── Recipient filtering ────────────────────────────────────────────────────────
 
 MALE_ONLY_KEYWORDS   = ["men's", "mens", "male", "suit", "tie", "necktie", "cufflink", "shaving"]
 FEMALE_ONLY_KEYWORDS = ["women's", "womens", "female", "saree", "kurti", "dupatta", "salwar",
                         "anarkali", "lehenga", "bra", "lipstick", "kanjivaram"]
+# One precompiled alternation per list: a single C-level scan per item instead of
+# a Python-level substring test for every keyword
+_MALE_ONLY_RE   = re.compile("|".join(map(re.escape, MALE_ONLY_KEYWORDS)))
+_FEMALE_ONLY_RE = re.compile("|".join(map(re.escape, FEMALE_ONLY_KEYWORDS)))
 
 FEMALE_RECIPIENTS = {"mom", "mother", "sister", "wife", "girlfriend", "aunt", "grandmother", "grandma"}
 MALE_RECIPIENTS   = {"dad", "father", "brother", "husband", "boyfriend", "uncle", "grandfather", "grandpa"}
 
 
+# Scan order for _extract_recipient, built once instead of on every request
+_RECIPIENT_KEYS = tuple(FEMALE_RECIPIENTS) + tuple(MALE_RECIPIENTS)
+
+
 def _extract_recipient(text: str) -> str:
     text_lower = text.lower()
-    for key in list(FEMALE_RECIPIENTS) + list(MALE_RECIPIENTS):
+    for key in _RECIPIENT_KEYS:
         if key in text_lower:
             return key
     return "anyone"
@@ -48,103 +111,205 @@ def _filter_items_by_recipient(items: List[Dict], user_intent: str) -> List[Dict
     if recipient == "anyone":
         return items
 
+    # Only one side of the filter can apply for a given recipient
+    if recipient in FEMALE_RECIPIENTS:
+        excluded_re, reason = _MALE_ONLY_RE, "male item for female recipient"
+    else:
+        excluded_re, reason = _FEMALE_ONLY_RE, "female item for male recipient"
+
     filtered = []
     for item in items:
         combined = (item.get("title", "") + " " + item.get("description", "")).lower()
-        if recipient in FEMALE_RECIPIENTS and any(kw in combined for kw in MALE_ONLY_KEYWORDS):
-            logger.info(f"  🚫 Filtered out '{item.get('title')}' — male item for female recipient")
-            continue
-        if recipient in MALE_RECIPIENTS and any(kw in combined for kw in FEMALE_ONLY_KEYWORDS):
-            logger.info(f"  🚫 Filtered out '{item.get('title')}' — female item for male recipient")
+        if excluded_re.search(combined):
+            logger.info("  🚫 Filtered out '%s' — %s", item.get('title'), reason)
             continue
         filtered.append(item)
 
-    logger.info(f"🎯 Recipient='{recipient}': {len(items)} items → {len(filtered)} after gender filter")
+    logger.info("🎯 Recipient='%s': %s items → %s after gender filter", recipient, len(items), len(filtered))
     return filtered if filtered else items
 
 
+_get_price = itemgetter("price")
+
+
+def _hydrate_bundle_items(bundles: List[Dict], items: List[Dict]) -> None:
+    """Replace the LLM's item ids with the catalogue details they point to (in place)."""
+    by_title: Optional[Dict[str, Dict]] = None  # built on first title-only entry
+    for bundle in bundles:
+        hydrated = []
+        for entry in bundle.get("items", []):
+            # {"id": 2, ...}, or just the id itself (2 / "2")
+            idx = entry.get("id") if isinstance(entry, dict) else entry
+            if isinstance(idx, str) and idx.strip().isdigit():
+                idx = int(idx)
+            if isinstance(idx, int) and not isinstance(idx, bool) and 0 <= idx < len(items):
+                item = items[idx]
+            elif isinstance(entry, dict) and entry.get("title"):
+                # Ollama / older responses may still answer with titles: one dict
+                # lookup each instead of scanning the candidates
+                if by_title is None:
+                    by_title = {i.get("title", ""): i for i in reversed(items)}
+                item = by_title.get(entry["title"])
+                if item is None:
+                    entry.setdefault("price", 0)
+                    hydrated.append(entry)
+                    continue
+            else:
+                logger.warning("⚠️ Dropping unrecognised bundle item %r", entry)
+                continue
+            hydrated.append({
+                "title":    item.get("title", ""),
+                "reason":   entry.get("reason", "") if isinstance(entry, dict) else "",
+                "price":    item.get("price", 0),
+                "category": item.get("category", ""),
+                "mongo_id": item.get("mongo_id", ""),
+            })
+        bundle["items"] = hydrated
+
+
+def _finalize_bundles(bundles: List[Dict], items: List[Dict]) -> None:
+    """Hydrate item ids and fill in total_price (in place)."""
+    _hydrate_bundle_items(bundles, items)
+    for bundle in bundles:
+        if "total_price" not in bundle:
+            # every hydrated item carries a price key, so a C-level itemgetter suffices
+            bundle["total_price"] = sum(map(_get_price, bundle["items"]))
+
+
 # ── Service ────────────────────────────────────────────────────────────────────
 
 class GiftBundleService:
     """Generates gift bundles using Gemini via genai library (v1beta)"""
 
     def __init__(self, llm_model: str = None):
-        self.preferred_model = llm_model or os.getenv("LLM_MODEL", "gemini-1.5-flash-8b")
-        self.google_api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
+        self.preferred_model = llm_model or LLM_MODEL
+        self.google_api_key = GOOGLE_API_KEY
         self.genai = None
+        self._models: Dict[str, Any] = {}
+        self._llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY_LIMIT)
+        self.request_timeout = LLM_TIMEOUT
+        self._bundle_cache: "OrderedDict[Tuple, Tuple[float, List[Dict]]]" = OrderedDict()
 
         if self.google_api_key:
             try:
                 import google.generativeai as genai
                 genai.configure(api_key=self.google_api_key)
                 self.genai = genai
-                logger.info(f"✅ GiftBundleService initialized (preferred: {self.preferred_model})")
+                # Build each model once; _call_gemini reuses them on every request.
+                # Preferred model first, then rest of chain.
+                chain = [self.preferred_model] + [m for m in GEMINI_MODEL_CHAIN if m != self.preferred_model]
+                self._models = {name: genai.GenerativeModel(name) for name in chain}
+                logger.info("✅ GiftBundleService initialized (preferred: %s)", self.preferred_model)
             except Exception as e:
-                logger.warning(f"⚠️ Gemini init failed: {e}")
+                logger.warning("⚠️ Gemini init failed: %s", e)
         else:
             logger.warning("⚠️ No Gemini API key — will use hardcoded fallback")
 
-    def _call_gemini(self, prompt: str) -> Dict:
+    async def _generate_with_retry(self, model, prompt: str):
+        """generate_content_async with a per-attempt timeout and exponential backoff on timeouts."""
+        for attempt in range(LLM_MAX_RETRIES):
+            try:
+                async with self._llm_semaphore:
+                    return await asyncio.wait_for(
+                        model.generate_content_async(
+                            prompt,
+                            generation_config={"max_output_tokens": 2048, "temperature": 0.7},
+                        ),
+                        timeout=self.request_timeout,
+                    )
+            except asyncio.TimeoutError:
+                if attempt == LLM_MAX_RETRIES - 1:
+                    raise
+                delay = min(0.5 * 2 ** attempt, 4.0)
+                logger.warning("⏱️ Gemini call timed out after %ss, retrying in %ss", self.request_timeout, delay)
+                await asyncio.sleep(delay)
+
+    async def _call_gemini(self, prompt: str) -> Dict:
         """Try each model in GEMINI_MODEL_CHAIN via genai library (v1beta endpoint)."""
         if not self.genai:
             raise Exception("Gemini not initialized")
 
-        # Put preferred model first, then rest of chain
-        chain = [self.preferred_model] + [m for m in GEMINI_MODEL_CHAIN if m != self.preferred_model]
         last_error = None
 
-        for model_name in chain:
+        for model_name, model in self._models.items():
             try:
-                model = self.genai.GenerativeModel(model_name)
-                response = model.generate_content(
-                    prompt,
-                    generation_config={"max_output_tokens": 2048, "temperature": 0.7},
-                )
-                text = response.text
-
-                if "```json" in text:
-                    text = text.split("```json")[1].split("```")[0]
-                elif "```" in text:
-                    text = text.split("```")[1].split("```")[0]
-                m = re.search(r"\{.*\}", text, re.DOTALL)
-                if m:
-                    text = m.group(0)
-
-                result = json.loads(text.strip())
-                logger.info(f"✅ Bundle generated via {model_name}")
+                response = await self._generate_with_retry(model, prompt)
+                result = parse_model_json(response.text)
+                logger.info("✅ Bundle generated via %s", model_name)
                 return result
 
             except Exception as e:
-                logger.warning(f"⚠️ Model '{model_name}' failed: {e}")
+                logger.warning("⚠️ Model '%s' failed: %s", model_name, e)
                 last_error = e
                 continue
 
         raise Exception(f"All Gemini models failed. Last error: {last_error}")
 
+    async def _call_ollama(self, prompt: str) -> Optional[Dict]:
+        """Local Ollama fallback (only used when ENABLE_OLLAMA=true)."""
+        async with self._llm_semaphore:
+            # Encode/decode with orjson on both sides instead of httpx's stdlib json
+            response = await open_ollama_client().post(
+                f"{OLLAMA_URL}/api/generate",
+                content=orjson.dumps(
+                    {"model": OLLAMA_MODEL, "prompt": prompt, "stream": False, "format": "json"}
+                ),
+                headers={"Content-Type": "application/json"},
+            )
+        response.raise_for_status()
+        result = orjson.loads(orjson.loads(response.content).get("response", "").strip())
+        logger.info("✅ Bundle generated via Ollama (%s)", OLLAMA_MODEL)
+        return result
+
+    @staticmethod
+    def _bundle_cache_key(user_intent: str, items: List[Dict]) -> Tuple:
+        item_ids = tuple(sorted(str(i.get("mongo_id") or i.get("title", "")) for i in items))
+        return (" ".join(user_intent.lower().split()), item_ids)
+
     async def generate_bundles(self, user_intent: str, items: List[Dict]) -> Dict[str, Any]:
         """Generate gift bundles with recipient-aware filtering"""
-        logger.info(f"🎨 Generating bundles: '{user_intent}' with {len(items)} items")
+        logger.info("🎨 Generating bundles: '%s' with %s items", user_intent, len(items))
 
         filtered_items = _filter_items_by_recipient(items, user_intent)
 
-        from services.gift_prompt_templates import get_gift_bundle_prompt
+        cache_key = self._bundle_cache_key(user_intent, filtered_items)
+        cached = self._bundle_cache.get(cache_key)
+        if cached is not None:
+            stored_at, bundles = cached
+            if time.monotonic() - stored_at < BUNDLE_CACHE_TTL:
+                self._bundle_cache.move_to_end(cache_key)
+                logger.info("♻️ Bundle cache hit for '%s'", user_intent)
+                # Callers mutate the result (metadata etc.), so hand out a copy
+                return {"query": user_intent, "bundles": copy.deepcopy(bundles)}
+            del self._bundle_cache[cache_key]
+
         prompt = get_gift_bundle_prompt(user_intent, filtered_items)
 
         result = None
         if self.google_api_key and self.genai:
             try:
-                result = self._call_gemini(prompt)
+                result = await self._call_gemini(prompt)
             except Exception as e:
-                logger.warning(f"⚠️ Gemini failed, using fallback: {e}")
+                logger.warning("⚠️ Gemini failed, using fallback: %s", e)
 
+        if not result and ENABLE_OLLAMA:
+            try:
+                result = await self._call_ollama(prompt)
+            except Exception as e:
+                logger.warning("⚠️ Ollama failed, using hardcoded fallback: %s", e)
+
+        # Only LLM output is worth caching; the hardcoded fallback should be retried
+        llm_generated = bool(result)
         if not result:
+            top3 = filtered_items[:3]
             result = {
                 "bundles": [{
                     "bundle_name": "Curated Selection",
                     "description": f"Items matching: {user_intent}",
                     "items": [
-                        {"title": item["title"], "reason": "Relevant to your needs"}
-                        for item in filtered_items[:3]
+                        {"title": item["title"], "reason": "Relevant to your needs",
+                         "price": item.get("price", 0)}
+                        for item in top3
                     ],
                 }]
             }
@@ -152,10 +317,11 @@ class GiftBundleService:
         if "bundles" not in result:
             result = {"bundles": []}
 
-        for bundle in result["bundles"]:
-            if "total_price" not in bundle:
-                bundle["total_price"] = sum(
-                    item.get("price", 0) for item in bundle.get("items", [])
-                )
+        _finalize_bundles(result["bundles"], filtered_items)
+
+        if llm_generated and result["bundles"]:
+            self._bundle_cache[cache_key] = (time.monotonic(), copy.deepcopy(result["bundles"]))
+            if len(self._bundle_cache) > BUNDLE_CACHE_SIZE:
+                self._bundle_cache.popitem(last=False)
 
-        return {"query": user_intent, "bundles": result["bundles"]}
\ No newline at end of file
+        return {"query": user_intent, "bundles": result["bundles"]}
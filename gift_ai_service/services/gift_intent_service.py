@@ -4,13 +4,36 @@ Member B: Extract gift intent from image + vision analysis
 FIXED: Use generate_text instead of generate_story
 """
 
-from core.llm_client import LLMClient
+from core.llm_client import get_llm_client, parse_model_json
 from typing import Dict, Any
 import logging
-import json
+import orjson
 
 logger = logging.getLogger(__name__)
 
+
+# Static part of the intent prompt; per-request hints are appended at the end
+# so the prefix stays identical across calls (prompt-cache friendly).
+INTENT_EXTRACTION_PROMPT = """Based on an image analysis, extract gift intent in JSON format.
+
+Return ONLY a valid JSON object (no markdown, no explanation):
+{
+    "occasion": "birthday|wedding|anniversary|diwali|housewarming|graduation|general",
+    "recipient": "friend|family|colleague|partner|self|anyone",
+    "budget_inr": 1000,
+    "sentiment": "warm|playful|elegant|traditional|modern",
+    "interests": ["handmade", "art", "decor"]
+}
+
+Rules:
+- Choose the most likely occasion based on the vision hints
+- Set budget to a reasonable amount (500-2000 INR range)
+- Interests should be 2-3 relevant keywords
+- Return ONLY the JSON, no other text
+
+"""
+
+
 async def extract_intent(
     image_bytes: bytes,
     vision_analysis: Dict[str, Any],
@@ -28,52 +51,32 @@ async def extract_intent(
             "interests": ["handmade", "pottery"]
         }
     """
-    llm = LLMClient()
+    llm = get_llm_client()
     
     # Build prompt from vision analysis
+    craft_type = vision_analysis.get('craft_type')
+    occasion_hint = vision_analysis.get('occasion_hint')
+    sentiment = vision_analysis.get('sentiment')
+
     vision_summary = []
-    if vision_analysis.get('craft_type') != 'unknown':
-        vision_summary.append(f"craft type: {vision_analysis.get('craft_type')}")
-    if vision_analysis.get('occasion_hint') != 'any':
-        vision_summary.append(f"occasion hint: {vision_analysis.get('occasion_hint')}")
-    if vision_analysis.get('sentiment') != 'neutral':
-        vision_summary.append(f"sentiment: {vision_analysis.get('sentiment')}")
+    if craft_type != 'unknown':
+        vision_summary.append(f"craft type: {craft_type}")
+    if occasion_hint != 'any':
+        vision_summary.append(f"occasion hint: {occasion_hint}")
+    if sentiment != 'neutral':
+        vision_summary.append(f"sentiment: {sentiment}")
     
     vision_text = ", ".join(vision_summary) if vision_summary else "general gift"
     
-    prompt = f"""Based on this image analysis, extract gift intent in JSON format.
-
-Vision Analysis: {vision_text}
-User Request: {user_prompt or "Find suitable gift"}
-
-Return ONLY a valid JSON object (no markdown, no explanation):
-{{
-    "occasion": "birthday|wedding|anniversary|diwali|housewarming|graduation|general",
-    "recipient": "friend|family|colleague|partner|self|anyone",
-    "budget_inr": 1000,
-    "sentiment": "warm|playful|elegant|traditional|modern",
-    "interests": ["handmade", "art", "decor"]
-}}
-
-Rules:
-- Choose the most likely occasion based on the vision hints
-- Set budget to a reasonable amount (500-2000 INR range)
-- Interests should be 2-3 relevant keywords
-- Return ONLY the JSON, no other text"""
+    prompt = INTENT_EXTRACTION_PROMPT + f"""Vision Analysis: {vision_text}
+User Request: {user_prompt or "Find suitable gift"}"""
     
     try:
         # Use generate_text method (not generate_story)
         result_text = await llm.generate_text(prompt)
         
-        # Parse JSON from result
-        # Remove markdown code blocks if present
-        clean_text = result_text.strip()
-        if '```json' in clean_text:
-            clean_text = clean_text.split('```json')[1].split('```')[0]
-        elif '```' in clean_text:
-            clean_text = clean_text.split('```')[1].split('```')[0]
-        
-        data = json.loads(clean_text.strip())
+        # Parse JSON from result (markdown fences stripped if present)
+        data = parse_model_json(result_text)
         
         # Validate and set defaults
         data.setdefault('occasion', 'birthday')
@@ -82,12 +85,12 @@ Rules:
         data.setdefault('sentiment', 'warm')
         data.setdefault('interests', ['handmade'])
         
-        logger.info(f"✅ Intent extracted: {data}")
+        logger.info("✅ Intent extracted: %s", data)
         return data
         
-    except json.JSONDecodeError as e:
-        logger.error(f"❌ JSON parse error: {e}")
-        logger.error(f"   Raw response: {result_text[:200]}")
+    except orjson.JSONDecodeError as e:
+        logger.error("❌ JSON parse error: %s", e)
+        logger.error("   Raw response: %s", result_text[:200])
         # Return fallback intent
         return {
             "occasion": "birthday",
@@ -97,7 +100,7 @@ Rules:
             "interests": ["handmade"]
         }
     except Exception as e:
-        logger.error(f"❌ Intent extraction failed: {e}")
+        logger.error("❌ Intent extraction failed: %s", e)
         import traceback
         traceback.print_exc()
         # Return fallback intent
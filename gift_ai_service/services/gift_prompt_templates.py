@@ -96,36 +96,22 @@
 """
 Prompt templates for generating gift bundles.
 FIXED: Recipient-aware prompt so the LLM knows to avoid gender-inappropriate items.
-"""
-
-
-def get_gift_bundle_prompt(user_intent: str, items: list) -> str:
-    """
-    Generate a structured prompt for creating gift bundles.
-    The LLM is explicitly instructed to respect recipient context.
-
-    Args:
-        user_intent: User's gift search intent (e.g. "birthday gift for mom")
-        items:       List of available (pre-filtered) items
 
-    Returns:
-        str: Formatted prompt for LLM
-    """
-    items_str = "\n".join([
-        f"- {item.get('title', 'Unknown')}: {item.get('description', 'No description')} "
-        f"(Category: {item.get('category', 'Unknown')}, Price: ₹{item.get('price', 0)})"
-        for item in items
-    ])
-
-    prompt = f"""You are a thoughtful gift recommendation expert with deep knowledge of Indian culture and gifting traditions.
+The static instructions come first and the request/items last, so every call
+shares a byte-identical prefix that Gemini can serve from its prompt cache.
+"""
 
-USER'S GIFT REQUEST: "{user_intent}"
+# Bound format methods, looked up once instead of per item.
+# Bundle items are sent as compact "id|title|category|price" rows; the LLM answers
+# with ids and GiftBundleService hydrates the full item details afterwards.
+_BUNDLE_ITEM_FMT   = "{i}|{t}|{c}|₹{p}".format
+_MAX_TITLE_CHARS   = 60
+_FALLBACK_ITEM_FMT = "- {t} (₹{p}, {c})".format
 
-AVAILABLE ITEMS (use ONLY these):
-{items_str}
+_BUNDLE_PROMPT_PREFIX = """You are a thoughtful gift recommendation expert with deep knowledge of Indian culture and gifting traditions.
 
 YOUR TASK:
-Create 1-3 thoughtful gift bundles. Follow these rules strictly:
+Create 1-3 thoughtful gift bundles from the AVAILABLE ITEMS for the USER'S GIFT REQUEST given at the end. Follow these rules strictly:
 
 1. RECIPIENT APPROPRIATENESS: Analyse the recipient from the user's request (e.g. "mom", "dad", "sister").
    - NEVER recommend items clearly meant for the wrong gender or age group.
@@ -137,25 +123,64 @@ Create 1-3 thoughtful gift bundles. Follow these rules strictly:
 
 3. HONEST REASONS: For each item, give a specific reason why it suits THIS recipient and occasion.
 
-4. USE ONLY the items listed above. Do not invent items.
+4. USE ONLY the items listed below, referring to each by its numeric id. Do not invent items.
 
 Return ONLY a valid JSON object — no markdown, no explanation:
-{{
+{
     "bundles": [
-        {{
+        {
             "bundle_name": "Creative Theme Name",
             "description": "1-2 sentences on why this bundle suits the recipient",
             "items": [
-                {{
-                    "title": "Exact title from the list above",
+                {
+                    "id": 0,
                     "reason": "Specific reason this suits the recipient"
-                }}
+                }
             ]
-        }}
+        }
     ]
-}}"""
+}
 
-    return prompt.strip()
+"""
+
+_FALLBACK_PROMPT_PREFIX = """Create 1-2 gift bundles for the gift request below.
+
+Important: Only recommend items that are appropriate for the recipient mentioned in the request.
+Return JSON with bundles containing bundle_name, description, and items (each with title and reason).
+Use only items from the list. Do not include gender-inappropriate items.
+
+"""
+
+
+def get_gift_bundle_prompt(user_intent: str, items: list) -> str:
+    """
+    Generate a structured prompt for creating gift bundles.
+    The LLM is explicitly instructed to respect recipient context.
+
+    Args:
+        user_intent: User's gift search intent (e.g. "birthday gift for mom")
+        items:       List of available (pre-filtered) items
+
+    Returns:
+        str: Formatted prompt for LLM
+    """
+    items_str = "\n".join(
+        _BUNDLE_ITEM_FMT(
+            i=idx,
+            t=(item.get('title') or 'Unknown')[:_MAX_TITLE_CHARS],
+            c=item.get('category', 'Unknown'),
+            p=item.get('price', 0),
+        )
+        for idx, item in enumerate(items)
+    )
+
+    return (
+        _BUNDLE_PROMPT_PREFIX
+        + f"""USER'S GIFT REQUEST: "{user_intent}"
+
+AVAILABLE ITEMS (use ONLY these; format id|title|category|price):
+{items_str}"""
+    )
 
 
 def get_fallback_prompt(user_intent: str, items: list) -> str:
@@ -169,19 +194,19 @@ def get_fallback_prompt(user_intent: str, items: list) -> str:
     Returns:
         str: Simplified prompt
     """
-    items_str = "\n".join([
-        f"- {item.get('title', 'Unknown')} (₹{item.get('price', 0)}, {item.get('category', 'Unknown')})"
+    items_str = "\n".join(
+        _FALLBACK_ITEM_FMT(
+            t=item.get('title', 'Unknown'),
+            p=item.get('price', 0),
+            c=item.get('category', 'Unknown'),
+        )
         for item in items
-    ])
+    )
 
-    prompt = f"""Create 1-2 gift bundles for: "{user_intent}"
-
-Important: Only recommend items that are appropriate for the recipient mentioned in the request.
+    return (
+        _FALLBACK_PROMPT_PREFIX
+        + f"""Gift request: "{user_intent}"
 
 Available items:
-{items_str}
-
-Return JSON with bundles containing bundle_name, description, and items (each with title and reason).
-Use only items from the list. Do not include gender-inappropriate items."""
-
-    return prompt.strip()
\ No newline at end of file
+{items_str}"""
+    )
\ No newline at end of file
@@ -100,11 +100,30 @@ FIXED: Recipient-aware search query so Qdrant retrieves gender-appropriate items
 FIXED: Don't use global vector_store, accept it as parameter
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from core.vector_store import VectorStore
 
 logger = logging.getLogger(__name__)
 
+# Connected store shared by callers that don't pass their own vector_store
+_vector_store: Optional[VectorStore] = None
+_vector_store_lock = asyncio.Lock()
+
+
+async def _get_vector_store() -> VectorStore:
+    """Return the shared VectorStore, connecting it on first use."""
+    global _vector_store
+    if _vector_store is None:
+        async with _vector_store_lock:
+            if _vector_store is None:
+                vs = VectorStore()
+                await vs.connect()
+                _vector_store = vs
+    return _vector_store
+
 # Maps recipient keywords to search-enhancing terms
 RECIPIENT_SEARCH_TERMS = {
     "mom":        "women feminine gift saree kurti home decor",
@@ -157,10 +176,32 @@ def _build_search_query(intent: Dict[str, Any]) -> str:
         query_parts.append(sentiment)
 
     query = ' '.join(filter(None, query_parts)) or 'handmade gift'
-    logger.info(f"🔍 Enriched retrieval query: '{query}'")
+    logger.info("🔍 Enriched retrieval query: '%s'", query)
     return query
 
 
+def _format_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Normalise payload structure so item fields sit at the root level."""
+    formatted_items = []
+    for item in items:
+        if 'payload' in item and not item.get('title'):
+            payload = item.get('payload', {})
+            formatted_item = {
+                'title':       payload.get('title', ''),
+                'description': payload.get('description', ''),
+                'price':       payload.get('price', 0),
+                'category':    payload.get('category', 'General'),
+                'mongo_id':    payload.get('mongo_id', ''),
+                'score':       item.get('score', 1.0),
+                'payload':     payload,
+            }
+        else:
+            formatted_item = item
+
+        formatted_items.append(formatted_item)
+    return formatted_items
+
+
 async def retrieve_similar(
     intent: Dict[str, Any],
     top_k: int = 5,
@@ -173,15 +214,15 @@ async def retrieve_similar(
         intent:       Extracted intent dict (occasion, recipient, interests …)
         top_k:        Number of items to retrieve from Qdrant
         vector_store: VectorStore instance passed from orchestrator
+                      (defaults to a shared, already-connected store)
 
     Returns:
         List of gift items with fields at root level
     """
-    if vector_store is None:
-        logger.error("❌ No vector_store provided to retrieve_similar")
-        raise Exception("Vector store not provided")
-
     try:
+        if vector_store is None:
+            vector_store = await _get_vector_store()
+
         search_query = _build_search_query(intent)
 
         # Fetch slightly more than top_k so post-filtering has room to work
@@ -191,32 +232,14 @@ async def retrieve_similar(
             limit=fetch_limit,
         )
 
-        logger.info(f"Found {len(items)} items from Qdrant for query: '{search_query}'")
-
-        # Normalise payload structure
-        formatted_items = []
-        for item in items:
-            if 'payload' in item and not item.get('title'):
-                payload = item.get('payload', {})
-                formatted_item = {
-                    'title':       payload.get('title', ''),
-                    'description': payload.get('description', ''),
-                    'price':       payload.get('price', 0),
-                    'category':    payload.get('category', 'General'),
-                    'mongo_id':    payload.get('mongo_id', ''),
-                    'score':       item.get('score', 1.0),
-                    'payload':     payload,
-                }
-            else:
-                formatted_item = item
-
-            formatted_items.append(formatted_item)
+        logger.info("Found %s items from Qdrant for query: '%s'", len(items), search_query)
 
         # Return only top_k after normalisation
-        return formatted_items[:top_k]
+        return _format_items(items)[:top_k]
 
     except Exception as e:
-        logger.error(f"Retrieval failed: {e}")
+        logger.error("Retrieval failed: %s", e)
         import traceback
         traceback.print_exc()
-        raise
\ No newline at end of file
+        raise
+
@@ -7,9 +7,43 @@ FIXED: More lenient defaults and better field checking
 import logging
 from typing import List, Dict, Any, Tuple
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
+# Failure bits packed into validate_items' per-item uint8 code
+_REASON_MISSING_TITLE = 1 << 0
+_REASON_OVER_BUDGET   = 1 << 1
+_REASON_BAD_PRICE     = 1 << 2
+_REASON_LOW_SCORE     = 1 << 3
+
+
+def _float_column(values: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert values to a float array. Entries float() can't convert become NaN
+    and are flagged in the returned mask; genuine NaNs are not flagged.
+    """
+    try:
+        out = np.asarray(values, dtype=float)
+        if out.shape != (len(values),):  # nested sequences give a 2-D array
+            raise ValueError("non-scalar values")
+    except (ValueError, TypeError):
+        out = np.full(len(values), np.nan)
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except (ValueError, TypeError):
+                pass
+    # numpy turns None into NaN where float() raises, so re-check only the NaN rows
+    unparseable = np.zeros(len(values), dtype=bool)
+    for i in np.flatnonzero(np.isnan(out)):
+        try:
+            float(values[i])
+        except (ValueError, TypeError):
+            unparseable[i] = True
+    return out, unparseable
+
+
 def validate_items(
     items: List[Dict],
     max_budget: float = None,
@@ -28,60 +62,63 @@ def validate_items(
         - List of valid items
         - List of invalid items with reasons
     """
-    required_fields = ['title']  # Only title is truly required
-    valid_items = []
+    n = len(items)
+
+    logger.info("🔍 Validating %s items", n)
+    logger.info("   Max budget: %s", f"₹{max_budget}" if max_budget else "None")
+    logger.info("   Min score: %s", min_quality_score)
+
+    # Fast path: with no budget/score threshold only the title matters
+    if not (max_budget is not None and max_budget > 0) and min_quality_score <= 0:
+        valid_items = [item for item in items if (item.get('title') or '').strip()]
+        invalid_items = [
+            {'item': item, 'reason': "Missing title"}
+            for item in items if not (item.get('title') or '').strip()
+        ] if len(valid_items) != n else []
+        logger.info("📊 Validation complete: %s valid, %s invalid items", len(valid_items), len(invalid_items))
+        return valid_items, invalid_items
+
+    # Column-wise checks: one pass to extract fields, then every failure packed
+    # into a per-item uint8 bitmap (see _REASON_* bits); 0 means valid
+    titles = [(item.get('title') or '').strip() for item in items]
+    codes = np.fromiter((not t for t in titles), dtype=np.uint8, count=n) * np.uint8(_REASON_MISSING_TITLE)
+
+    check_budget = max_budget is not None and max_budget > 0
+    check_score = min_quality_score > 0
+    if check_budget:
+        prices, bad_prices = _float_column([item.get('price', 0) for item in items])
+        codes[prices > max_budget] |= _REASON_OVER_BUDGET
+        codes[bad_prices] |= _REASON_BAD_PRICE
+
+    if check_score:
+        # NaN (and unparseable) scores compare False, so they are never rejected
+        scores, _ = _float_column([item.get('score', 1.0) for item in items])
+        codes[scores < min_quality_score] |= _REASON_LOW_SCORE
+
+    valid_items = [items[i] for i in np.flatnonzero(codes == 0)]
     invalid_items = []
-    
-    logger.info(f"🔍 Validating {len(items)} items")
-    logger.info(f"   Max budget: {f'₹{max_budget}' if max_budget else 'None'}")
-    logger.info(f"   Min score: {min_quality_score}")
-    
-    for idx, item in enumerate(items, 1):
+
+    # Reason strings are only built for rejected rows, decoded from their bits
+    log_rejects = logger.isEnabledFor(logging.DEBUG)
+    for i in np.flatnonzero(codes):
+        code = codes[i]
         reasons = []
-        
-        # Get fields (already at root level from vector_store)
-        title = item.get('title', '').strip()
-        description = item.get('description', '').strip()
-        price = item.get('price', 0)
-        score = item.get('score', 1.0)
-        
-        # Check required fields
-        if not title:
+        if code & _REASON_MISSING_TITLE:
             reasons.append("Missing title")
-        
-        # Description is optional but warn if missing
-        if not description:
-            logger.debug(f"Item '{title}' has no description (non-critical)")
-        
-        # Check budget (only if max_budget is specified)
-        if max_budget is not None and max_budget > 0:
-            try:
-                price_float = float(price)
-                if price_float > max_budget:
-                    reasons.append(f"Price ₹{price_float:.2f} exceeds budget ₹{max_budget:.2f}")
-            except (ValueError, TypeError):
-                reasons.append(f"Invalid price format: {price}")
-        
-        # Check quality score (only if threshold is set)
-        if min_quality_score > 0:
-            try:
-                score_float = float(score)
-                if score_float < min_quality_score:
-                    reasons.append(f"Score {score_float:.2f} below threshold {min_quality_score:.2f}")
-            except (ValueError, TypeError):
-                pass  # Don't reject for invalid score
-        
-        # Categorize
-        if reasons:
-            invalid_items.append({
-                'item': item,
-                'reason': '; '.join(reasons)
-            })
-            logger.info(f"   [{idx}] ❌ INVALID: {title or 'Unknown'} - {', '.join(reasons)}")
-        else:
-            valid_items.append(item)
-            logger.info(f"   [{idx}] ✅ VALID: {title} (₹{price}, score: {score:.3f})")
-    
-    logger.info(f"📊 Validation complete: {len(valid_items)} valid, {len(invalid_items)} invalid items")
-    
-    return valid_items, invalid_items
\ No newline at end of file
+        if code & _REASON_BAD_PRICE:
+            reasons.append(f"Invalid price format: {items[i].get('price', 0)}")
+        elif code & _REASON_OVER_BUDGET:
+            reasons.append(f"Price ₹{prices[i]:.2f} exceeds budget ₹{max_budget:.2f}")
+        if code & _REASON_LOW_SCORE:
+            reasons.append(f"Score {scores[i]:.2f} below threshold {min_quality_score:.2f}")
+
+        invalid_items.append({
+            'item': items[i],
+            'reason': '; '.join(reasons)
+        })
+        if log_rejects:
+            logger.debug("   [%s] ❌ INVALID: %s - %s", i + 1, titles[i] or 'Unknown', ', '.join(reasons))
+
+    logger.info("📊 Validation complete: %s valid, %s invalid items", len(valid_items), len(invalid_items))
+
+    return valid_items, invalid_items
@@ -44,11 +44,13 @@ async def setup_gift_service():
         # Refresh vector store
         print("\n📦 Refreshing vector store...")
         print("   1️⃣  Setting up Qdrant collection...")
-        print("   2️⃣  Loading items from MongoDB...")
-        print("   3️⃣  Generating embeddings...")
-        print("   4️⃣  Uploading to Qdrant...")
+        print("   2️⃣  Streaming items from MongoDB in batches...")
+        print("   3️⃣  Generating embeddings and uploading each batch to Qdrant...")
         
-        result = await orchestrator.refresh_vector_store()
+        def report_batch(batch_no: int, uploaded: int):
+            print(f"   📤 Batch {batch_no} uploaded ({uploaded} items so far)")
+        
+        result = await orchestrator.refresh_vector_store(limit=None, on_batch=report_batch)
         
         if result.get("success"):
             items_count = result.get("items_count", 0)
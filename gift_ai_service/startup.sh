@@ -34,7 +34,7 @@ echo "⚡ Starting Gunicorn..."
 
 # Start Gunicorn
 exec gunicorn \
-    -w 1 \
+    -w ${WEB_CONCURRENCY:-1} \
     -k uvicorn.workers.UvicornWorker \
     main:app \
     --bind=0.0.0.0:$PORT \
@@ -0,0 +1,59 @@
+"""
+tests/test_fraud_hashes.py
+--------------------------
+Unit tests for the flagged-image dHash set behind the fraud preflight (main.py).
+"""
+
+import io
+
+import pytest
+from PIL import Image
+
+import main
+from main import flag_fraud_image, image_dhash, is_known_fraud_image
+
+# Alternating bits: 32 ones, far from the all-0/all-1 hashes of flat images
+TEXTURED = int("10" * 32, 2)
+
+
+@pytest.fixture(autouse=True)
+def clear_flagged():
+    main._flagged_image_hashes.clear()
+    yield
+    main._flagged_image_hashes.clear()
+
+
+def _flat_png(colour):
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 64), colour).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def test_near_duplicate_of_flagged_hash_is_known():
+    flag_fraud_image(TEXTURED)
+    assert is_known_fraud_image(TEXTURED ^ 0b111)
+    assert not is_known_fraud_image(TEXTURED ^ ((1 << 64) - 1))
+
+
+def test_flat_images_are_never_flagged_or_matched():
+    blank, plain = image_dhash(_flat_png("white")), image_dhash(_flat_png("beige"))
+    assert blank == plain == 0
+
+    flag_fraud_image(blank)
+    assert not main._flagged_image_hashes
+    assert not is_known_fraud_image(plain)
+
+
+def test_flagged_hashes_expire(monkeypatch):
+    flag_fraud_image(TEXTURED)
+    monkeypatch.setattr(main, "FRAUD_HASH_TTL", -1.0)
+    assert not is_known_fraud_image(TEXTURED)
+    assert not main._flagged_image_hashes
+
+
+def test_oldest_flagged_hash_is_evicted(monkeypatch):
+    monkeypatch.setattr(main, "FRAUD_HASH_MAX_ENTRIES", 2)
+    first, second, third = TEXTURED, TEXTURED ^ (0xFF << 8), TEXTURED ^ (0xFF << 32)
+    for image_hash in (first, second, third):
+        flag_fraud_image(image_hash)
+    assert list(main._flagged_image_hashes) == [second, third]
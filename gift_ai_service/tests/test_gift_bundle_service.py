@@ -0,0 +1,54 @@
+"""
+tests/test_gift_bundle_service.py
+---------------------------------
+Unit tests for bundle item hydration in services.gift_bundle_service.
+"""
+
+from services.gift_bundle_service import _finalize_bundles
+
+ITEMS = [
+    {"title": "Clay Diya", "price": 150, "category": "decor", "mongo_id": "a"},
+    {"title": "Brass Lamp", "price": 900, "category": "decor", "mongo_id": "b"},
+    {"title": "Silk Stole", "price": 1200, "category": "textile", "mongo_id": "c"},
+]
+
+
+def test_id_entries_are_hydrated_from_candidates():
+    bundles = [{"items": [{"id": 0, "reason": "festive"}, {"id": "2", "reason": "soft"}]}]
+    _finalize_bundles(bundles, ITEMS)
+
+    assert [i["title"] for i in bundles[0]["items"]] == ["Clay Diya", "Silk Stole"]
+    assert bundles[0]["items"][0]["reason"] == "festive"
+    assert bundles[0]["total_price"] == 1350
+
+
+def test_bare_ids_are_treated_as_ids():
+    bundles = [{"items": [0, "2", " 1 "]}]
+    _finalize_bundles(bundles, ITEMS)
+
+    assert [i["mongo_id"] for i in bundles[0]["items"]] == ["a", "c", "b"]
+    assert all(i["reason"] == "" for i in bundles[0]["items"])
+    assert bundles[0]["total_price"] == 2250
+
+
+def test_title_entries_and_unknown_entries():
+    bundles = [{"items": [
+        {"title": "Brass Lamp", "reason": "glow"},
+        {"title": "Not In Catalogue"},
+        {"id": 99},
+        True,
+        None,
+    ]}]
+    _finalize_bundles(bundles, ITEMS)
+
+    items = bundles[0]["items"]
+    assert [i["title"] for i in items] == ["Brass Lamp", "Not In Catalogue"]
+    assert items[0]["price"] == 900
+    assert items[1]["price"] == 0
+    assert bundles[0]["total_price"] == 900
+
+
+def test_existing_total_price_is_kept():
+    bundles = [{"items": [1], "total_price": 42}]
+    _finalize_bundles(bundles, ITEMS)
+    assert bundles[0]["total_price"] == 42
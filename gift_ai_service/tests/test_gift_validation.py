@@ -0,0 +1,113 @@
+"""
+tests/test_gift_validation.py
+-----------------------------
+Unit tests for services.gift_validation_service.validate_items.
+"""
+
+import pytest
+
+from services.gift_validation_service import validate_items
+
+
+def _reasons(invalid):
+    return [entry["reason"] for entry in invalid]
+
+
+def test_no_threshold_fast_path_only_checks_title():
+    items = [
+        {"title": "Clay Diya", "price": 99999, "score": 0.01},
+        {"title": "   ", "price": 100},
+        {"title": None},
+        {"price": 50},
+        {"title": "Brass Lamp", "price": "not a number"},
+    ]
+    valid, invalid = validate_items(items)
+
+    assert valid == [items[0], items[4]]
+    assert [entry["item"] for entry in invalid] == [items[1], items[2], items[3]]
+    assert _reasons(invalid) == ["Missing title"] * 3
+
+
+def test_all_valid_returns_no_invalid_items():
+    items = [{"title": "A", "price": 100}, {"title": "B", "price": 200}]
+    valid, invalid = validate_items(items, max_budget=500)
+    assert valid == items
+    assert invalid == []
+
+
+def test_over_budget_reason():
+    items = [{"title": "Silk Saree", "price": 2500}, {"title": "Mug", "price": "300"}]
+    valid, invalid = validate_items(items, max_budget=2000)
+
+    assert valid == [items[1]]
+    assert _reasons(invalid) == ["Price ₹2500.00 exceeds budget ₹2000.00"]
+
+
+@pytest.mark.parametrize("price", ["abc", None, [1, 2]])
+def test_unparseable_price_is_rejected(price):
+    items = [{"title": "Odd", "price": price}]
+    valid, invalid = validate_items(items, max_budget=1000)
+
+    assert valid == []
+    assert _reasons(invalid) == [f"Invalid price format: {price}"]
+
+
+@pytest.mark.parametrize("price", [float("nan"), "nan"])
+def test_nan_price_is_not_over_budget(price):
+    # float() accepts NaN and NaN > budget is False, so the item passes
+    items = [{"title": "Mystery", "price": price}]
+    valid, invalid = validate_items(items, max_budget=1000)
+
+    assert valid == items
+    assert invalid == []
+
+
+def test_low_score_reason():
+    items = [{"title": "Weak", "score": 0.2}, {"title": "Strong", "score": 0.9}]
+    valid, invalid = validate_items(items, min_quality_score=0.5)
+
+    assert valid == [items[1]]
+    assert _reasons(invalid) == ["Score 0.20 below threshold 0.50"]
+
+
+@pytest.mark.parametrize("score", [float("nan"), "high", None])
+def test_nan_or_unparseable_score_is_not_rejected(score):
+    items = [{"title": "Unscored", "score": score}]
+    valid, invalid = validate_items(items, min_quality_score=0.5)
+
+    assert valid == items
+    assert invalid == []
+
+
+def test_missing_score_defaults_to_pass():
+    items = [{"title": "No score"}]
+    valid, _ = validate_items(items, min_quality_score=0.99)
+    assert valid == items
+
+
+def test_multiple_reasons_are_joined_in_order():
+    items = [{"title": "", "price": 5000, "score": 0.1}]
+    _, invalid = validate_items(items, max_budget=1000, min_quality_score=0.5)
+
+    assert _reasons(invalid) == [
+        "Missing title; Price ₹5000.00 exceeds budget ₹1000.00; Score 0.10 below threshold 0.50"
+    ]
+
+
+def test_missing_title_with_threshold_set():
+    items = [{"title": None, "price": 10}, {"price": 10}, {"title": "Ok", "price": 10}]
+    valid, invalid = validate_items(items, max_budget=100)
+
+    assert valid == [items[2]]
+    assert _reasons(invalid) == ["Missing title", "Missing title"]
+
+
+def test_zero_budget_disables_budget_check():
+    items = [{"title": "Pricey", "price": 10_000}]
+    valid, invalid = validate_items(items, max_budget=0)
+    assert valid == items
+    assert invalid == []
+
+
+def test_empty_input():
+    assert validate_items([], max_budget=100, min_quality_score=0.5) == ([], [])
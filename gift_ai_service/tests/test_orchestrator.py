@@ -1,17 +1,81 @@
 """
 tests/test_orchestrator.py
 --------------------------
-Unit test for orchestrator integration pipeline.
+Unit tests for the orchestrator's text query pipeline.
 """
 
+from unittest.mock import AsyncMock
+
 import pytest
 from core.orchestrator import GiftOrchestrator
 
+
+@pytest.fixture
+def orch(mocker):
+    """Orchestrator with its clients mocked out (no Mongo/Qdrant/Gemini)."""
+    mocker.patch("core.orchestrator.VectorStore")
+    mocker.patch("core.orchestrator.LLMClient")
+    mocker.patch("core.orchestrator.GiftBundleService")
+    orch = GiftOrchestrator()
+    orch.vector_store.search_related_items = AsyncMock()
+    orch.bundle_service.generate_bundles = AsyncMock()
+    return orch
+
+
 @pytest.mark.asyncio
-async def test_generate_bundle_pipeline(mocker):
-    """Basic integration test mock."""
-    mock_llm = mocker.Mock()
-    mock_vector = mocker.Mock()
-    orch = GiftOrchestrator(mock_llm, mock_vector)
-    result = await orch.generate_bundle_pipeline("Gift for mom under 2000")
-    assert isinstance(result, dict)
+async def test_process_gift_query_builds_bundles_from_valid_items(orch):
+    items = [
+        {"title": "Clay Diya", "price": 150, "score": 0.9},
+        {"title": "", "price": 200, "score": 0.8},
+        {"title": "Brass Lamp", "price": 900, "score": 0.7},
+    ]
+    orch.vector_store.search_related_items.return_value = items
+    orch.bundle_service.generate_bundles.return_value = {
+        "query": "Gift for mom under 2000",
+        "bundles": [{"bundle_name": "Festive", "items": []}],
+    }
+
+    result = await orch.process_gift_query("Gift for mom under 2000", limit=5)
+
+    orch.vector_store.search_related_items.assert_awaited_once_with(
+        text="Gift for mom under 2000", collection_name=None, limit=5
+    )
+    orch.bundle_service.generate_bundles.assert_awaited_once_with(
+        "Gift for mom under 2000", [items[0], items[2]]
+    )
+    assert result["bundles"] == [{"bundle_name": "Festive", "items": []}]
+    assert result["metadata"] == {
+        "total_items_retrieved": 3,
+        "valid_items_count": 2,
+        "invalid_items_count": 1,
+    }
+
+
+@pytest.mark.asyncio
+async def test_process_gift_query_without_matches(orch):
+    orch.vector_store.search_related_items.return_value = []
+
+    result = await orch.process_gift_query("anything")
+
+    assert result == {"query": "anything", "bundles": [], "error": "No matching items found"}
+    orch.bundle_service.generate_bundles.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_process_gift_query_without_valid_items(orch):
+    orch.vector_store.search_related_items.return_value = [{"title": ""}, {"price": 10}]
+
+    result = await orch.process_gift_query("anything")
+
+    assert result["error"] == "No valid items available"
+    orch.bundle_service.generate_bundles.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_process_gift_query_reports_failures(orch):
+    orch.vector_store.search_related_items.side_effect = RuntimeError("qdrant down")
+
+    result = await orch.process_gift_query("anything")
+
+    assert result["bundles"] == []
+    assert result["error"] == "Processing failed: qdrant down"
@@ -0,0 +1,61 @@
+"""
+tests/test_vector_store.py
+--------------------------
+Unit tests for search in core.vector_store and services.gift_retrieval_service.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from core.vector_store import VectorStore
+from services.gift_retrieval_service import retrieve_similar
+
+
+def _hit(point_id, title, score=0.9):
+    return SimpleNamespace(
+        id=point_id,
+        score=score,
+        payload={"title": title, "description": "", "category": "decor", "price": 100, "mongo_id": title},
+    )
+
+
+@pytest.fixture
+def store():
+    vs = VectorStore()
+    vs.qdrant_client = Mock()
+    return vs
+
+
+@pytest.mark.asyncio
+async def test_search_pads_query_embedding_and_maps_hits(store):
+    store.generate_embedding = lambda text: [0.2] * 10
+    store.qdrant_client.search.return_value = [_hit(2, "Brass Lamp")]
+
+    items = await store.search_related_items("lamp")
+
+    assert items == [store._hit_to_item(_hit(2, "Brass Lamp"))]
+    assert store.qdrant_client.search.call_args.kwargs["query_vector"] == [0.2] * 10 + [0.0] * 758
+
+
+@pytest.mark.asyncio
+async def test_search_with_failed_embedding_skips_qdrant(store):
+    store.generate_embedding = lambda text: []
+
+    assert await store.search_related_items("broken") == []
+    store.qdrant_client.search.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_retrieve_similar_formats_and_truncates():
+    vs = Mock()
+    vs.search_related_items = AsyncMock(return_value=[
+        {"title": f"Item {n}", "score": 0.5} for n in range(10)
+    ])
+    intent = {"occasion": "diwali", "recipient": "mom", "interests": ["decor"]}
+
+    results = await retrieve_similar(intent, top_k=3, vector_store=vs)
+
+    assert [r["title"] for r in results] == ["Item 0", "Item 1", "Item 2"]
+    assert vs.search_related_items.call_args.kwargs["text"].startswith("diwali gift for mom")
@@ -0,0 +1,45 @@
+"""
+tests/test_vision_images.py
+---------------------------
+Unit tests for the image format handling in front of Gemini Vision (main.py).
+"""
+
+import io
+
+import pytest
+from PIL import Image
+
+from main import image_mime_type, prepare_vision_image
+
+
+def _encode(fmt, mode="RGB", size=(32, 24)):
+    buf = io.BytesIO()
+    Image.new(mode, size, "red").save(buf, fmt)
+    return buf.getvalue()
+
+
+@pytest.mark.parametrize("fmt, mime", [
+    ("JPEG", "image/jpeg"),
+    ("PNG", "image/png"),
+    ("WEBP", "image/webp"),
+])
+def test_supported_formats_pass_through_untouched(fmt, mime):
+    data = _encode(fmt)
+    assert image_mime_type(data) == mime
+    assert prepare_vision_image(data) == (data, mime)
+
+
+@pytest.mark.parametrize("fmt, mode", [("GIF", "P"), ("BMP", "RGB"), ("TIFF", "RGB")])
+def test_other_formats_are_reencoded_as_jpeg(fmt, mode):
+    data = _encode(fmt, mode)
+    assert image_mime_type(data) is None
+
+    out, mime = prepare_vision_image(data)
+    assert mime == "image/jpeg"
+    assert image_mime_type(out) == "image/jpeg"
+    assert Image.open(io.BytesIO(out)).size == (32, 24)
+
+
+def test_undecodable_bytes_raise_value_error():
+    with pytest.raises(ValueError):
+        prepare_vision_image(b"definitely not an image")
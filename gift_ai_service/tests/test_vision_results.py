@@ -0,0 +1,170 @@
+"""
+tests/test_vision_results.py
+----------------------------
+Unit tests for the combined vision analysis and its result cache (main.py).
+"""
+
+import pytest
+
+import main
+
+
+@pytest.fixture(autouse=True)
+def clean_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "VISION_DISK_CACHE", False)
+    monkeypatch.setattr(main, "VISION_DISK_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(main, "VISION_CACHE_GENERATION_FILE", tmp_path / "generation")
+    monkeypatch.setattr(main, "_vision_generation", 0)
+    monkeypatch.setattr(main, "_generation_checked_at", float("-inf"))
+    main._vision_results.clear()
+    yield
+    main._vision_results.clear()
+
+
+def _reply(monkeypatch, reply):
+    calls = []
+
+    async def fake_call(image_bytes, prompt):
+        calls.append(prompt)
+        return reply
+
+    monkeypatch.setattr(main, "call_vision_direct", fake_call)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_parsed_reply_is_merged_over_defaults_and_cached(monkeypatch):
+    calls = _reply(monkeypatch, {"craft": {"craft_type": "pottery", "confidence": 0.9}})
+
+    results = await main.analyze_combined(b"img-1")
+
+    assert results["craft"] == {"craft_type": "pottery", "confidence": 0.9}
+    assert results["quality"] == {"quality": "medium"}
+    assert await main.analyze_combined(b"img-1") is results
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_unparseable_reply_keeps_raw_text_and_is_not_cached(monkeypatch):
+    calls = _reply(monkeypatch, {"raw_response": "Sorry, I can't help with that"})
+
+    results = await main.analyze_combined(b"img-2")
+
+    assert results["craft"] == {"craft_type": "unknown", "raw_response": "Sorry, I can't help with that"}
+    assert results["occasion"]["raw_response"] == "Sorry, I can't help with that"
+    assert main.image_key(b"img-2") not in main._vision_results
+
+    await main.analyze_combined(b"img-2")
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_non_object_reply_falls_back_to_defaults(monkeypatch):
+    _reply(monkeypatch, ["not", "an", "object"])
+
+    results = await main.analyze_combined(b"img-3")
+
+    assert results["price"] == {"estimated_price": 1000}
+    assert not main._vision_results
+
+
+@pytest.mark.asyncio
+async def test_sections_drop_nulls_and_values_the_model_rejects(monkeypatch):
+    _reply(monkeypatch, {
+        "craft": {"craft_type": None, "confidence": "high", "details": "wheel-thrown"},
+        "price": {"estimated_price": "₹1200", "price_range_inr": "1000-1500"},
+        "fraud": {"fraud_score": "0.2", "red_flags": [{"flag": "watermark"}]},
+    })
+
+    results = await main.analyze_combined(b"img-4")
+
+    assert results["craft"] == {"craft_type": "unknown", "details": "wheel-thrown"}
+    assert results["price"] == {"estimated_price": 1000, "price_range_inr": "1000-1500"}
+    assert results["fraud"] == {"fraud_score": "0.2"}
+    for name, model in main.VISION_RESULT_MODELS.items():
+        model.model_validate(results[name])
+
+
+def test_odd_reply_is_not_a_server_error(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    _reply(monkeypatch, {"craft": {"craft_type": None, "confidence": "high"}})
+
+    response = TestClient(main.app).post("/analyze_craft", files={"image": ("a.jpg", b"img-5")})
+
+    assert response.status_code == 200
+    assert response.json()["craft_type"] == "unknown"
+    assert response.json()["confidence"] is None
+
+
+@pytest.mark.asyncio
+async def test_disk_results_are_keyed_by_cache_version(monkeypatch):
+    monkeypatch.setattr(main, "VISION_DISK_CACHE", True)
+    calls = _reply(monkeypatch, {"craft": {"craft_type": "pottery"}})
+
+    await main.analyze_combined(b"img-6")
+    main._vision_results.clear()
+    await main.analyze_combined(b"img-6")
+    assert len(calls) == 1  # second lookup served from disk
+
+    main._vision_results.clear()
+    monkeypatch.setattr(main, "VISION_CACHE_VERSION", "new-prompt")
+    await main.analyze_combined(b"img-6")
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_generation_bump_from_another_worker_drops_memory_cache(monkeypatch):
+    calls = _reply(monkeypatch, {"craft": {"craft_type": "pottery"}})
+    await main.analyze_combined(b"img-7")
+
+    # another worker handled /cache/invalidate
+    main._bump_generation()
+    monkeypatch.setattr(main, "_generation_checked_at", float("-inf"))
+
+    await main.analyze_combined(b"img-7")
+    assert len(calls) == 2
+
+
+def test_invalidate_endpoint_bumps_generation_and_purges_disk(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(main, "VISION_DISK_CACHE", True)
+    _reply(monkeypatch, {"craft": {"craft_type": "pottery"}})
+    client = TestClient(main.app)
+    client.post("/analyze_craft", files={"image": ("a.jpg", b"img-8")})
+
+    body = client.post("/cache/invalidate").json()
+
+    assert body["memory_entries"] == 1
+    assert body["disk_entries"] == 1
+    assert body["generation"] == main._read_generation() == 1
+    assert not main._vision_results
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_count_one_miss_and_joins(monkeypatch):
+    import asyncio
+
+    stats = {"hits": 0, "misses": 0, "joins": 0, "disk_hits": 0}
+    monkeypatch.setattr(main, "_vision_cache_stats", stats)
+    # generation was just checked, so no request yields on the generation file read
+    monkeypatch.setattr(main, "_generation_checked_at", main.time.monotonic())
+    release = asyncio.Event()
+    calls = []
+
+    async def slow_call(image_bytes, prompt):
+        calls.append(prompt)
+        await release.wait()
+        return {"craft": {"craft_type": "pottery"}}
+
+    monkeypatch.setattr(main, "call_vision_direct", slow_call)
+
+    pending = [asyncio.ensure_future(main.analyze_combined(b"img-9")) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(*pending)
+    await main.analyze_combined(b"img-9")
+
+    assert len(calls) == 1
+    assert stats == {"hits": 1, "misses": 1, "joins": 2, "disk_hits": 0}